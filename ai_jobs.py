@@ -0,0 +1,180 @@
+"""
+AI(Gemini) 생성 작업을 백그라운드 잡으로 실행하는 모듈
+
+라우트는 잡을 등록하고 바로 job id를 반환하며,
+실제 모델 호출은 offload.run_blocking 을 통해 허브 밖에서 실행된다.
+결과는 상태 조회 엔드포인트와 Socket.IO 이벤트(ai_job_update)로 전달된다.
+"""
+import time
+import uuid
+import threading
+import logging
+
+import metrics
+from offload import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# 잡 상태
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+AI_JOBS = metrics.Counter('ai_jobs_total', '종료된 AI 잡 수', ('kind', 'status'))
+
+
+class AIJob:
+    def __init__(self, kind, owner_id, classroom_id):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner_id = owner_id
+        self.classroom_id = classroom_id
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'classroom_id': self.classroom_id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class AIJobManager:
+    """
+    Flask 확장 형태의 잡 매니저 (LoginManager 처럼 init_app 으로 초기화)
+
+    설정값
+      AI_JOB_TIMEOUT         : 잡 하나의 모델 호출 제한 시간(초)
+      AI_JOB_MAX_CONCURRENCY : 동시에 실행할 수 있는 잡 수
+      AI_JOB_RESULT_TTL      : 완료된 잡을 메모리에 보관하는 시간(초)
+    """
+
+    def __init__(self, app=None, socketio=None):
+        self.app = None
+        self.socketio = None
+        self._jobs = {}
+        self._prefetched = {}
+        self._lock = threading.Lock()
+        self._slots = None
+        if app is not None:
+            self.init_app(app, socketio)
+
+    def init_app(self, app, socketio):
+        app.config.setdefault('AI_JOB_TIMEOUT', 60)
+        app.config.setdefault('AI_JOB_MAX_CONCURRENCY', 4)
+        app.config.setdefault('AI_JOB_RESULT_TTL', 600)
+        self.app = app
+        self.socketio = socketio
+        self._slots = threading.BoundedSemaphore(app.config['AI_JOB_MAX_CONCURRENCY'])
+        app.extensions['ai_jobs'] = self
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(self, kind, fn, *args, owner_id=None, classroom_id=None, on_success=None, reuse=None):
+        """
+        fn(*args)를 백그라운드에서 실행하는 잡을 등록하고 AIJob을 반환
+
+        fn 은 OS 스레드에서 실행되므로 DB/앱 컨텍스트에 접근하면 안 된다.
+        on_success(result)는 앱 컨텍스트 안에서 호출되며, DB 저장 등 후처리를 담당하고
+        반환값이 잡의 최종 결과가 된다.
+        reuse 로 같은 작업을 미리 실행 중인(프리페치) 잡을 넘기면 그 결과를 기다려 사용하고,
+        실패한 경우에만 fn 을 직접 실행한다.
+        """
+        job = AIJob(kind, owner_id, classroom_id)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self.socketio.start_background_task(self._run, job, fn, args, on_success, reuse)
+        return job
+
+    def prefetch(self, key, kind, fn, *args, meta=None):
+        """
+        결과가 곧 필요할 것으로 예상되는 작업을 미리 실행 (같은 key 가 이미 있으면 재사용)
+        meta 는 get_prefetched/iter_prefetched 에서 유사한 요청을 찾을 때 사용
+        """
+        with self._lock:
+            entry = self._prefetched.get(key)
+            if entry is not None and entry[0].status != FAILED:
+                return entry[0]
+        job = self.submit(kind, fn, *args)
+        with self._lock:
+            self._prefetched[key] = (job, meta)
+        return job
+
+    def get_prefetched(self, key):
+        with self._lock:
+            entry = self._prefetched.get(key)
+        if entry is None or entry[0].status == FAILED:
+            return None
+        return entry[0]
+
+    def iter_prefetched(self):
+        """실패하지 않은 프리페치 잡 목록 [(key, job, meta)]"""
+        with self._lock:
+            entries = list(self._prefetched.items())
+        return [(key, job, meta) for key, (job, meta) in entries if job.status != FAILED]
+
+    def _run(self, job, fn, args, on_success, reuse):
+        if reuse is not None:
+            # 프리페치 잡은 자신의 슬롯에서 실행되므로 슬롯을 잡지 않고 기다림
+            reuse.done_event.wait(self.app.config['AI_JOB_TIMEOUT'])
+            if reuse.status == DONE:
+                self._finish(job, lambda: reuse.result, on_success)
+                return
+
+        with self._slots:
+            job.status = RUNNING
+            self._notify(job)
+            self._finish(job, lambda: run_blocking(fn, *args, timeout=self.app.config['AI_JOB_TIMEOUT']),
+                         on_success)
+
+    def _finish(self, job, get_result, on_success):
+        try:
+            result = get_result()
+            if on_success is not None:
+                with self.app.app_context():
+                    result = on_success(result)
+            job.result = result
+            job.status = DONE
+        except Exception as e:
+            logger.exception("AI 잡 실패 (%s, %s)", job.kind, job.id)
+            job.error = str(e) or e.__class__.__name__
+            job.status = FAILED
+        job.finished_at = time.time()
+        job.done_event.set()
+        AI_JOBS.inc(kind=job.kind, status=job.status)
+        self._notify(job)
+
+    def _notify(self, job):
+        if job.classroom_id is None:
+            return
+        # 초안 내용이 학생에게 노출되지 않도록 해당 클래스룸의 교수자 전용 방으로만 전송
+        room = f'classroom_{job.classroom_id}_professor'
+        metrics.observe_emit(self.socketio, 'ai_job_update', room)
+        self.socketio.emit('ai_job_update', job.to_dict(), room=room)
+
+    def _prune(self):
+        expire_before = time.time() - self.app.config['AI_JOB_RESULT_TTL']
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < expire_before]
+        for job_id in expired:
+            del self._jobs[job_id]
+        expired = [key for key, (job, _) in self._prefetched.items()
+                   if job.finished and job.finished_at < expire_before]
+        for key in expired:
+            del self._prefetched[key]
@@ -1,18 +1,44 @@
 import os
+from dotenv import load_dotenv
+# .env 파일 로드
+load_dotenv()
+
+# Socket.IO 비동기 모드 (기본 eventlet, 로컬 테스트/벤치마크 시 threading 사용 가능)
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "eventlet")
+if ASYNC_MODE == "eventlet":
+    # 다른 모듈을 import 하기 전에 patch 해야 스레드/소켓이 그린 스레드로 동작함
+    import eventlet
+    eventlet.monkey_patch()
+
 import ast
+import io
+import csv
 import json
+import threading
 import random
-import prompt, prompt_for_selection
+import prompt, prompt_for_selection, prompt_for_summary
 import string
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+import unicodedata
+import hashlib
+import difflib
+from functools import partial
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context, \
+    session, make_response
+from markupsafe import Markup
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_socketio import SocketIO, emit, join_room, leave_room
-from dotenv import load_dotenv
-# .env 파일 로드
-load_dotenv()
+from ai_jobs import AIJobManager
+from offload import run_blocking, map_blocking
+from user_cache import UserCache, CachedUser
+from fragments import FragmentCache
+from vote_buffer import VoteBuffer
+from broadcast import BroadcastScheduler
+from socket_queue import LocalSocketManager
+import metrics
+import migrations
 
 app = Flask(__name__)
 # SECRET_KEY를 환경변수에서 가져오고, 없으면 fallback 사용
@@ -27,8 +53,84 @@ if db_url and db_url.startswith("postgres://"):
 app.config['SQLALCHEMY_DATABASE_URI'] = db_url or "sqlite:///test.db"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# AI 생성 잡 설정 (제한 시간(초), 동시 실행 수)
+app.config['AI_JOB_TIMEOUT'] = int(os.getenv("AI_JOB_TIMEOUT", 60))
+app.config['AI_JOB_MAX_CONCURRENCY'] = int(os.getenv("AI_JOB_MAX_CONCURRENCY", 4))
+
+# AI 상황 생성 캐시 설정 (주제별 보관 변형 수, 유효 기간(초), 최대 보관 행 수)
+app.config['SCENARIO_CACHE_VARIANTS'] = int(os.getenv("SCENARIO_CACHE_VARIANTS", 3))
+app.config['SCENARIO_CACHE_TTL'] = int(os.getenv("SCENARIO_CACHE_TTL", 60 * 60 * 24 * 30))
+app.config['SCENARIO_CACHE_MAX_ROWS'] = int(os.getenv("SCENARIO_CACHE_MAX_ROWS", 1000))
+
+# 수정된 초안도 미리 받아 둔 AI 선택을 재사용할 수 있는 최소 유사도 (0~1)
+app.config['SELECTION_PREFETCH_SIMILARITY'] = float(os.getenv("SELECTION_PREFETCH_SIMILARITY", 0.9))
+
+# 투표 업데이트 브로드캐스트 묶음 간격(ms), 0 이면 묶지 않음
+app.config['BROADCAST_WINDOW_MS'] = int(os.getenv("BROADCAST_WINDOW_MS", 150))
+
+# 계측: 이 시간(ms) 이상 걸린 요청은 쿼리 목록과 함께 로그, /metrics 접근 토큰 (미설정 시 공개)
+app.config['SLOW_REQUEST_MS'] = int(os.getenv("SLOW_REQUEST_MS", 0))
+app.config['METRICS_TOKEN'] = os.getenv("METRICS_TOKEN")
+
+# 비밀번호 해시 동시 실행 수 (scrypt 는 1회당 메모리를 많이 사용), 명단 일괄 등록 최대 인원
+app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.getenv("PASSWORD_HASH_CONCURRENCY", 4))
+app.config['ROSTER_IMPORT_MAX_ROWS'] = int(os.getenv("ROSTER_IMPORT_MAX_ROWS", 1000))
+
+# 로그인 사용자 캐시 유효 시간(초)
+app.config['USER_CACHE_TTL'] = int(os.getenv("USER_CACHE_TTL", 300))
+# 투표 목록/결과 영역 렌더링 캐시 최대 항목 수
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv("FRAGMENT_CACHE_SIZE", 1000))
+# 클래스룸 투표 목록 한 번에 보여줄 개수 (나머지는 스크롤 시 불러옴)
+app.config['POLL_PAGE_SIZE'] = int(os.getenv("POLL_PAGE_SIZE", 20))
+# 투표 저장 방식: direct(요청마다 커밋) / buffered(메모리에 모아 묶음 커밋)
+app.config['VOTE_INGEST_MODE'] = os.getenv("VOTE_INGEST_MODE", "direct")
+app.config['VOTE_FLUSH_INTERVAL_MS'] = int(os.getenv("VOTE_FLUSH_INTERVAL_MS", 20))
+app.config['VOTE_FLUSH_MAX_BATCH'] = int(os.getenv("VOTE_FLUSH_MAX_BATCH", 200))
+# 여러 주제 한 번에 초안 만들기: 한 번에 요청할 수 있는 최대 주제 수
+app.config['BULK_DRAFT_MAX_TOPICS'] = int(os.getenv("BULK_DRAFT_MAX_TOPICS", 8))
+# gunicorn 워커 수 (Procfile 의 -w 와 같은 값, 2 이상이면 워커 간 Socket.IO 공유 사용)
+app.config['WEB_WORKERS'] = int(os.getenv("WEB_WORKERS", 1))
+
 db = SQLAlchemy(app)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet') 
+# 여러 워커 프로세스 간 Socket.IO 방/브로드캐스트 공유 (SOCKETIO_MESSAGE_QUEUE)
+#   미설정     : 워커가 1개면 메모리, 여러 개(WEB_WORKERS > 1)면 local:// 사용
+#   (Heroku 가 자동으로 설정하는 WEB_CONCURRENCY 는 사용하지 않음. 여러 워커는 WEB_WORKERS 로 직접 켜야 함)
+#   local://   : 같은 머신의 워커끼리 UNIX 소켓으로 공유 (외부 브로커 불필요)
+#   redis://, amqp:// 등 : Flask-SocketIO 의 Redis/Kombu 매니저 사용 (redis 또는 kombu 설치 필요)
+message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+if message_queue is None and app.config['WEB_WORKERS'] > 1:
+    message_queue = "local://"
+socketio_options = {}
+if message_queue and message_queue.startswith("local:"):
+    # 같은 머신에서 실행되는 다른 앱 인스턴스와 기본 소켓 디렉터리가 겹치지 않도록 구분
+    socketio_options['client_manager'] = LocalSocketManager(
+        message_queue, instance=f"{app.root_path}|{app.config['SQLALCHEMY_DATABASE_URI']}")
+elif message_queue:
+    socketio_options['message_queue'] = message_queue
+
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE, **socketio_options) 
+
+@app.context_processor
+def socketio_client_options():
+    # 여러 워커로 실행될 때만 long-polling 요청이 다른 워커로 가지 않도록 websocket 만 사용
+    # (워커가 1개면 websocket 이 막힌 환경에서도 long-polling 으로 연결되도록 기본값 유지)
+    options = {'transports': ['websocket']} if app.config['WEB_WORKERS'] > 1 else {}
+    return {'socketio_client_options': options}
+
+# Gemini 호출은 백그라운드 잡으로 실행 (eventlet 허브를 막지 않도록)
+ai_jobs = AIJobManager(app, socketio)
+# 투표가 몰릴 때 클래스룸 방별로 vote_update 를 묶어서 전송
+broadcaster = BroadcastScheduler(app, socketio)
+
+# 라우트별 응답 시간/쿼리 수 계측 및 Socket.IO 방 인원, 브로드캐스트 묶음 통계
+metrics.init_app(app)
+metrics.Gauge('socketio_room_members', '클래스룸 방별 연결 인원 (이 워커 기준)', ('room',),
+              callback=metrics.room_size_callback(socketio))
+metrics.Gauge('broadcast_messages', '브로드캐스트 묶음 전송 통계', ('type',),
+              callback=lambda: {(k,): v for k, v in broadcaster.stats().items()})
+fragment_cache = FragmentCache(max_size=app.config['FRAGMENT_CACHE_SIZE'])
+metrics.Gauge('fragment_cache', '템플릿 조각 캐시 통계', ('type',),
+              callback=lambda: {(k,): v for k, v in fragment_cache.stats().items()})
 
 # Flask-Login 초기화
 login_manager = LoginManager()
@@ -51,41 +153,136 @@ class Classroom(db.Model):
     professor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # 투표 목록이 바뀔 때마다 증가 (classroom_view 의 ETag, 목록 조각 캐시 키)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 클래스룸 삭제 시 하위 Poll도 함께 삭제 (Cascade Delete)
-    polls = db.relationship('Poll', backref='classroom', lazy=True, cascade="all, delete-orphan")
+    # passive_deletes: 삭제 시 Poll 을 불러오지 않고 DB(ON DELETE CASCADE)와 delete_polls 에 맡김
+    polls = db.relationship('Poll', backref='classroom', lazy=True, cascade="all, delete-orphan",
+                            passive_deletes=True)
+
+    __table_args__ = (
+        # dashboard: professor_id 로 필터 후 created_at 정렬
+        db.Index('ix_classroom_professor_created', 'professor_id', 'created_at'),
+    )
 
 
 class Poll(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id'), nullable=False)
+    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id', ondelete='CASCADE'), nullable=False)
     question = db.Column(db.String(500), nullable=False)
     options = db.Column(db.Text, nullable=False)  # JSON 형태로 저장
     ai_option = db.Column(db.Integer, nullable=False)
     ai_evidence = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    # 투표가 반영될 때마다 증가 (클라이언트가 놓친 업데이트를 감지하고 재동기화, poll_view 의 ETag)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Poll 삭제 시 하위 Vote, 집계도 함께 삭제 (Cascade Delete)
+    votes = db.relationship('Vote', backref='poll', lazy=True, cascade="all, delete-orphan",
+                            passive_deletes=True)
+    tallies = db.relationship('PollTally', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
-    # Poll 삭제 시 하위 Vote도 함께 삭제 (Cascade Delete)
-    votes = db.relationship('Vote', backref='poll', lazy=True, cascade="all, delete-orphan")
+    __table_args__ = (
+        # classroom_view: classroom_id 로 필터 후 (created_at, id) 순서로 키셋 페이지 조회
+        db.Index('ix_poll_classroom_created_id', 'classroom_id', 'created_at', 'id'),
+    )
 
 class Vote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), nullable=False)
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     option_index = db.Column(db.Integer, nullable=False)
     evidence = db.Column(db.Text, nullable=False)
     ai_opinion = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 마지막으로 투표를 변경한 시각 (의견 요약을 새 투표만으로 갱신하기 위함)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # 투표 변경 직전의 선택지 (upsert 한 문장으로 이전 값을 돌려받아 집계를 갱신하기 위함)
+    previous_option_index = db.Column(db.Integer)
+    # 이 투표를 저장하며 올린 Poll.version (커밋 순서대로 증가하므로 의견 요약에 반영된 투표 구분에 사용)
+    poll_version = db.Column(db.Integer)
 
     user = db.relationship('User', backref='votes')
 
+    __table_args__ = (
+        # 학생 1명당 Poll 하나에 한 표 (poll_view 의 poll_id 조회에도 사용)
+        db.Index('uq_vote_poll_user', 'poll_id', 'user_id', unique=True),
+        db.Index('ix_vote_user', 'user_id'),
+    )
+
+class PollTally(db.Model):
+    """Poll 선택지별 득표 수 (submit_vote 에서 Vote 변경과 같은 트랜잭션으로 갱신)"""
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id', ondelete='CASCADE'), primary_key=True)
+    option_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class PollSummary(db.Model):
+    """Poll 의 학생 의견(선택 이유, AI 에게 한 말) AI 요약 (Poll 버전이 같으면 재사용)"""
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)       # 요약에 반영된 Poll.version
+    vote_count = db.Column(db.Integer, nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    through_version = db.Column(db.Integer)                # 반영된 투표 중 가장 큰 Vote.poll_version
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'summary': self.summary,
+            'version': self.version,
+            'vote_count': self.vote_count,
+        }
+
+class PollDraft(db.Model):
+    """여러 주제 한 번에 생성한 투표 초안 (교수자가 검토 후 최종 제출하면 삭제)"""
+    id = db.Column(db.Integer, primary_key=True)
+    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id', ondelete='CASCADE'), nullable=False)
+    topic = db.Column(db.String(200), nullable=False)
+    question = db.Column(db.String(500), nullable=False)
+    options = db.Column(db.Text, nullable=False)  # JSON 형태로 저장
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_poll_draft_classroom', 'classroom_id', 'created_at'),
+    )
+
+    @property
+    def option_list(self):
+        return json.loads(self.options)
+
+class ScenarioCache(db.Model):
+    """generate_situation 결과 캐시 (정규화된 주제 + 프롬프트 버전별로 여러 변형 보관)"""
+    id = db.Column(db.Integer, primary_key=True)
+    topic_key = db.Column(db.String(200), nullable=False)
+    prompt_version = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)  # {'question', 'options'} JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_scenario_cache_topic', 'topic_key', 'prompt_version'),
+    )
+
 # ===========================
 # 로그인 관련
 # ===========================
+# 요청/소켓 이벤트마다 DB 를 조회하지 않도록 id, username, role 만 캐시
+user_cache = UserCache(ttl=app.config['USER_CACHE_TTL'])
+
+def load_user_record(user_id):
+    user = db.session.get(User, user_id)
+    return CachedUser(user.id, user.username, user.role) if user else None
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(int(user_id), load_user_record)
+
+@db.event.listens_for(User, "after_update")
+@db.event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
 
 # ===========================
 # 유틸 함수
@@ -97,6 +294,662 @@ def generate_classroom_code():
         if not Classroom.query.filter_by(code=code).first():
             return code
 
+# 비밀번호 해시/검증은 의도적으로 CPU 를 많이 쓰므로 OS 스레드에서 실행 (동시 실행 수 제한)
+password_slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_CONCURRENCY'])
+
+def hash_password(password):
+    with password_slots:
+        return run_blocking(generate_password_hash, password)
+
+def verify_password(password_hash, password):
+    with password_slots:
+        return run_blocking(check_password_hash, password_hash, password)
+
+def hash_passwords(passwords):
+    """여러 비밀번호를 병렬로 해시 (명단 일괄 등록용, 로그인과 같은 password_slots 로 동시 실행 수 제한)"""
+    return map_blocking(generate_password_hash, passwords,
+                        max_workers=app.config['PASSWORD_HASH_CONCURRENCY'], limiter=password_slots)
+
+def parse_roster(text):
+    """
+    '아이디,비밀번호' 형식의 CSV/붙여넣기 텍스트를 [(아이디, 비밀번호)] 로 변환
+    반환: (rows, 잘못된 줄 번호 목록)
+    """
+    rows, invalid = [], []
+    for line_no, record in enumerate(csv.reader(io.StringIO(text)), start=1):
+        record = [value.strip() for value in record]
+        if not any(record):
+            continue
+        # 첫 줄이 머리글이면 건너뜀
+        if line_no == 1 and record[0].lower() in ("username", "아이디", "id"):
+            continue
+        if len(record) < 2 or not record[0] or not record[1] or len(record[0]) > 80:
+            invalid.append(line_no)
+            continue
+        rows.append((record[0], record[1]))
+    return rows, invalid
+
+def wants_json():
+    """fetch(XHR) 요청이면 redirect 대신 JSON으로 응답"""
+    return request.headers.get("X-Requested-With") == "XMLHttpRequest"
+
+def parse_situation(ai_response_str):
+    """generate_situation 결과(['상황', '선택지1', ...])를 dict로 변환"""
+    try:
+        output_list = ast.literal_eval(ai_response_str)
+        return {'question': output_list[0], 'options': list(output_list[1:])}
+    except Exception:
+        metrics.LLM_PARSE_FAILURES.inc(kind='situation')
+        raise
+
+def parse_json_response(ai_response_str):
+    """모델 응답에서 JSON 부분만 읽음 (```json 코드 블록, 앞뒤 설명 문장은 무시)"""
+    start = min((i for i in (ai_response_str.find('['), ai_response_str.find('{')) if i >= 0), default=-1)
+    end = max(ai_response_str.rfind(']'), ai_response_str.rfind('}'))
+    if start < 0 or end < start:
+        raise ValueError("응답에서 JSON 을 찾을 수 없습니다.")
+    return json.loads(ai_response_str[start:end + 1])
+
+def parse_situations(ai_response_str, topics):
+    """
+    generate_situations 결과를 [{'topic', 'question', 'options'}, ...] 로 변환
+    형식이 잘못된 항목은 건너뛰고, 하나도 쓸 수 없으면 예외 발생
+    """
+    try:
+        items = parse_json_response(ai_response_str)
+        if isinstance(items, dict):
+            items = items.get('scenarios') or [items]
+        scenarios = []
+        for i, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('situation'), str) \
+                    or not isinstance(item.get('options'), list) or len(item['options']) < 2:
+                continue
+            topic = item.get('topic') or (topics[i] if i < len(topics) else '')
+            scenarios.append({
+                'topic': str(topic)[:200],
+                'question': item['situation'],
+                'options': [str(option) for option in item['options']],
+            })
+        if not scenarios:
+            raise ValueError("생성된 상황이 없습니다.")
+        return scenarios
+    except Exception:
+        metrics.LLM_PARSE_FAILURES.inc(kind='situation_batch')
+        raise
+
+def parse_selection(ai_option_raw):
+    """generate_selection 결과([선택지 번호, '선택 이유'])를 dict로 변환"""
+    try:
+        # AI 출력 정리 (예: ``` 제거, 줄바꿈 제거)
+        cleaned = ai_option_raw.strip().replace("```", "").replace("\n", "")
+        ai_output_list = ast.literal_eval(cleaned)
+        return {'ai_option': int(ai_output_list[0]), 'ai_evidence': ai_output_list[1]}
+    except Exception:
+        metrics.LLM_PARSE_FAILURES.inc(kind='selection')
+        raise
+
+# ===========================
+# 투표 집계
+# ===========================
+def ensure_tally(poll):
+    """
+    집계 행이 없는 Poll 이면 Vote 로부터 채움 (기존 Poll 은 migrations.fill_poll_tallies 에서 채워지므로 대비용)
+    GET 요청에서도 호출되므로 동시에 처음 조회되어도 충돌하지 않도록 INSERT ... ON CONFLICT DO NOTHING 사용
+    """
+    if PollTally.query.filter_by(poll_id=poll.id).first():
+        return
+    counts = dict(
+        db.session.query(Vote.option_index, db.func.count(Vote.id))
+        .filter(Vote.poll_id == poll.id)
+        .group_by(Vote.option_index)
+        .all()
+    )
+    rows = [{'poll_id': poll.id, 'option_index': i, 'count': counts.get(i, 0)}
+            for i in range(len(json.loads(poll.options)))]
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # ON CONFLICT 를 지원하지 않는 DB 용
+        db.session.add_all(PollTally(**row) for row in rows)
+        db.session.flush()
+        return
+    db.session.execute(insert(PollTally).values(rows).on_conflict_do_nothing(
+        index_elements=['poll_id', 'option_index']))
+
+def adjust_tally(poll_id, option_index, delta):
+    # count = count + delta 로 갱신하여 동시 투표에도 값이 유실되지 않음
+    PollTally.query.filter_by(poll_id=poll_id, option_index=option_index) \
+        .update({PollTally.count: PollTally.count + delta}, synchronize_session=False)
+
+def delete_polls(*criteria):
+    """
+    조건에 맞는 Poll 과 하위 Vote, 집계, 요약 행을 객체로 불러오지 않고 DELETE 문으로 삭제
+    (ORM cascade 는 모든 Vote 를 불러와 한 줄씩 지우므로 오래 사용한 클래스룸에서 매우 느림.
+     PostgreSQL 은 ON DELETE CASCADE 로도 지워지지만, 기존 SQLite DB 는 제약을 바꿀 수 없어 직접 삭제)
+    """
+    poll_ids = db.select(Poll.id).where(*criteria)
+    Vote.query.filter(Vote.poll_id.in_(poll_ids)).delete(synchronize_session=False)
+    PollTally.query.filter(PollTally.poll_id.in_(poll_ids)).delete(synchronize_session=False)
+    PollSummary.query.filter(PollSummary.poll_id.in_(poll_ids)).delete(synchronize_session=False)
+    Poll.query.filter(*criteria).delete(synchronize_session=False)
+
+def tally_counts(poll):
+    """AI 선택을 포함한 선택지별 득표 수 {선택지 번호: 득표 수}"""
+    counts = {
+        tally.option_index: tally.count
+        for tally in PollTally.query.filter_by(poll_id=poll.id)
+    }
+    counts[poll.ai_option] = counts.get(poll.ai_option, 0) + 1
+    return counts
+
+def poll_cursor(poll):
+    return f"{poll.created_at.isoformat()}_{poll.id}"
+
+def poll_page(classroom_id, before=None):
+    """
+    최신순 투표 목록 한 페이지와 다음 페이지 커서(없으면 None) 반환
+    OFFSET 대신 마지막 항목의 (created_at, id) 보다 오래된 것만 조회 (키셋 페이지네이션)
+    """
+    size = app.config['POLL_PAGE_SIZE']
+    query = Poll.query.filter(Poll.classroom_id == classroom_id)
+    if before is not None:
+        created_at, poll_id = before.rsplit('_', 1)
+        query = query.filter(db.tuple_(Poll.created_at, Poll.id) <
+                             (datetime.fromisoformat(created_at), int(poll_id)))
+    polls = query.order_by(Poll.created_at.desc(), Poll.id.desc()).limit(size + 1).all()
+    if len(polls) > size:
+        return polls[:size], poll_cursor(polls[size - 1])
+    return polls, None
+
+def bump_classroom_version(classroom_id):
+    Classroom.query.filter_by(id=classroom_id) \
+        .update({Classroom.version: Classroom.version + 1}, synchronize_session=False)
+
+def poll_summary(poll):
+    """new_poll 이벤트/목록에서 사용하는 Poll 요약 (백그라운드 잡에서도 호출되므로 url_for 사용 안 함)"""
+    return {
+        'poll_id': poll.id,
+        'question': poll.question,
+        'created_at': poll.created_at.strftime('%m/%d %H:%M'),
+        'is_active': poll.is_active,
+    }
+
+def upsert_vote(poll_id, user_id, option_index, evidence, ai_opinion, poll_version):
+    """
+    투표를 INSERT ... ON CONFLICT DO UPDATE 한 문장으로 저장하고 이전 선택지를 반환 (새 투표면 None)
+    동시에 중복 제출되어도 (poll_id, user_id) 고유 인덱스로 한 행만 남는다.
+    poll_version: 이 투표를 위해 올린 Poll.version
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return _upsert_vote_orm(poll_id, user_id, option_index, evidence, ai_opinion, poll_version)
+
+    stmt = insert(Vote).values(poll_id=poll_id, user_id=user_id, option_index=option_index,
+                               evidence=evidence, ai_opinion=ai_opinion, updated_at=datetime.utcnow(),
+                               poll_version=poll_version)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['poll_id', 'user_id'],
+        # SET 의 우변은 기존 행 기준으로 계산되므로 Vote.option_index 는 변경 전 값
+        set_={
+            'previous_option_index': Vote.option_index,
+            'option_index': stmt.excluded.option_index,
+            'evidence': stmt.excluded.evidence,
+            'ai_opinion': stmt.excluded.ai_opinion,
+            'updated_at': stmt.excluded.updated_at,
+            'poll_version': stmt.excluded.poll_version,
+        }
+    ).returning(Vote.previous_option_index)
+    return db.session.execute(stmt).scalar_one()
+
+def _upsert_vote_orm(poll_id, user_id, option_index, evidence, ai_opinion, poll_version):
+    # ON CONFLICT 를 지원하지 않는 DB 용 (조회 후 저장)
+    existing_vote = Vote.query.filter_by(poll_id=poll_id, user_id=user_id).first()
+    if existing_vote is None:
+        db.session.add(Vote(poll_id=poll_id, user_id=user_id, option_index=option_index,
+                            evidence=evidence, ai_opinion=ai_opinion, poll_version=poll_version))
+        return None
+    previous_option = existing_vote.option_index
+    existing_vote.previous_option_index = previous_option
+    existing_vote.option_index = option_index
+    existing_vote.evidence = evidence
+    existing_vote.ai_opinion = ai_opinion
+    existing_vote.updated_at = datetime.utcnow()
+    existing_vote.poll_version = poll_version
+    return previous_option
+
+def schedule_vote_update(poll, version, counts, username, option_index, previous_option, evidence, ai_opinion):
+    # 클라이언트가 페이지를 다시 불러오지 않고 결과를 갱신할 수 있도록
+    # 전체 득표 수와 변경된 투표자 정보, 버전을 함께 전송
+    # (BroadcastScheduler 가 방별로 모아 vote_update_batch 로 전송)
+    broadcaster.schedule('vote_update', {
+        'poll_id': poll.id,
+        'version': version,
+        'counts': {str(k): v for k, v in counts.items()},
+        'total': sum(counts.values()),
+        'user': username,
+        'option': option_index,
+        'previous_option': previous_option,
+        'evidence':evidence,
+        'ai_opinion':ai_opinion
+    }, f'classroom_{poll.classroom_id}')
+
+def apply_votes(votes):
+    """VoteBuffer 에 모인 투표를 한 트랜잭션으로 저장(그룹 커밋)한 뒤 vote_update 전송"""
+    polls = {poll.id: poll for poll in Poll.query.filter(Poll.id.in_({vote['poll_id'] for vote in votes}))}
+    for poll in polls.values():
+        ensure_tally(poll)
+
+    grouped = {}  # poll_id -> [vote]
+    for vote in votes:
+        if vote['poll_id'] in polls:  # 저장 전에 삭제된 투표는 제외
+            grouped.setdefault(vote['poll_id'], []).append(vote)
+
+    # Poll 버전을 투표 수만큼 한 번에 올리고, 각 투표에 연속된 버전을 배정
+    # (투표 저장보다 먼저 올려서 각 Vote 에 자신의 버전을 기록)
+    last_versions = {
+        poll_id: db.session.execute(
+            db.update(Poll).where(Poll.id == poll_id)
+            .values(version=Poll.version + len(items)).returning(Poll.version)
+        ).scalar_one()
+        for poll_id, items in grouped.items()
+    }
+
+    applied = {}  # poll_id -> [(vote, 버전, 이전 선택지)]
+    for poll_id, items in grouped.items():
+        first_version = last_versions[poll_id] - len(items) + 1
+        for offset, vote in enumerate(items):
+            version = first_version + offset
+            previous_option = upsert_vote(poll_id, vote['user_id'], vote['option_index'],
+                                          vote['evidence'], vote['ai_opinion'], version)
+            if previous_option != vote['option_index']:
+                if previous_option is not None:
+                    adjust_tally(poll_id, previous_option, -1)
+                adjust_tally(poll_id, vote['option_index'], 1)
+            applied.setdefault(poll_id, []).append((vote, version, previous_option))
+    # 득표 수는 커밋 전에 읽어서 배정한 버전 시점의 값을 보냄
+    counts = {poll_id: tally_counts(polls[poll_id]) for poll_id in applied}
+    db.session.commit()
+
+    for poll_id, items in applied.items():
+        for vote, version, previous_option in items:
+            schedule_vote_update(polls[poll_id], version, counts[poll_id], vote['username'], vote['option_index'],
+                                 previous_option, vote['evidence'], vote['ai_opinion'])
+
+vote_buffer = VoteBuffer(app, socketio, apply_votes)
+metrics.Gauge('vote_buffer', '투표 쓰기 지연 버퍼 통계', ('type',),
+              callback=lambda: {(k,): v for k, v in vote_buffer.stats().items()})
+
+def load_poll_results(poll):
+    """
+    집계 테이블에서 득표 수를, join 쿼리 한 번으로 투표자 정보를 가져옴
+    반환: (results, voters, evidences, opinions, vote_rows)
+    """
+    ensure_tally(poll)
+    results = tally_counts(poll)
+    vote_rows = db.session.query(
+        Vote.user_id, Vote.option_index, Vote.evidence, Vote.ai_opinion, User.username
+    ).join(User, Vote.user_id == User.id) \
+        .filter(Vote.poll_id == poll.id) \
+        .order_by(Vote.id).all()
+
+    voters = {poll.ai_option: ['AI']}
+    evidences = {'AI': poll.ai_evidence}
+    opinions = {}
+
+    for row in vote_rows:
+        voters.setdefault(row.option_index, []).append(row.username)
+        evidences[row.username] = row.evidence
+        opinions[row.username] = row.ai_opinion
+
+    return results, voters, evidences, opinions, vote_rows
+
+# ===========================
+# 결과 내보내기
+# ===========================
+EXPORT_FIELDS = [
+    'poll_id', 'poll_created_at', 'question', 'options', 'ai_option', 'ai_option_text', 'ai_evidence',
+    'username', 'option_index', 'option_text', 'evidence', 'ai_opinion', 'voted_at',
+]
+EXPORT_BATCH_SIZE = 500
+
+def export_rows(classroom_id):
+    """
+    클래스룸의 모든 Poll 과 투표를 한 줄씩 반환 (투표가 없는 Poll 은 투표 항목이 빈 한 줄)
+    Poll LEFT JOIN Vote LEFT JOIN User 를 서버 측 커서로 EXPORT_BATCH_SIZE 개씩 읽음
+    """
+    query = db.session.query(
+        Poll.id, Poll.created_at, Poll.question, Poll.options, Poll.ai_option, Poll.ai_evidence,
+        User.username, Vote.option_index, Vote.evidence, Vote.ai_opinion,
+        # 선택을 바꾼 투표는 마지막으로 바꾼 시각
+        db.func.coalesce(Vote.updated_at, Vote.created_at).label('voted_at')
+    ).select_from(Poll) \
+        .outerjoin(Vote, Vote.poll_id == Poll.id) \
+        .outerjoin(User, Vote.user_id == User.id) \
+        .filter(Poll.classroom_id == classroom_id) \
+        .order_by(Poll.created_at, Poll.id, Vote.id) \
+        .execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+    poll_id, options = None, []
+    for row in query:
+        # 같은 Poll 의 행은 연속으로 나오므로 선택지는 Poll 마다 한 번만 파싱
+        if row.id != poll_id:
+            poll_id, options = row.id, json.loads(row.options)
+        yield {
+            'poll_id': row.id,
+            'poll_created_at': row.created_at.isoformat() if row.created_at else None,
+            'question': row.question,
+            'options': options,
+            'ai_option': row.ai_option,
+            'ai_option_text': options[row.ai_option] if row.ai_option < len(options) else None,
+            'ai_evidence': row.ai_evidence,
+            'username': row.username,
+            'option_index': row.option_index,
+            'option_text': options[row.option_index] if row.option_index is not None and row.option_index < len(options) else None,
+            'evidence': row.evidence,
+            'ai_opinion': row.ai_opinion,
+            'voted_at': row.voted_at.isoformat() if row.voted_at else None,
+        }
+
+# 엑셀 등에서 수식으로 실행되는 값의 첫 글자
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def csv_safe(value):
+    """학생/AI 가 작성한 문자열이 수식으로 실행되지 않도록 앞에 ' 를 붙임"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    # 엑셀에서 한글이 깨지지 않도록 BOM 추가
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        row['options'] = json.dumps(row['options'], ensure_ascii=False)
+        writer.writerow({key: csv_safe(value) for key, value in row.items()})
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+EXPORT_FORMATS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (export_ndjson, 'application/x-ndjson; charset=utf-8'),
+}
+
+# ===========================
+# AI 상황 생성 캐시
+# ===========================
+def normalize_topic(topic):
+    """전각/반각, 공백, 대소문자 차이를 무시한 캐시 키"""
+    return " ".join(unicodedata.normalize("NFKC", topic).split()).lower()[:200]
+
+def scenario_cache_query(topic_key):
+    fresh_after = datetime.utcnow() - timedelta(seconds=app.config['SCENARIO_CACHE_TTL'])
+    return ScenarioCache.query.filter(
+        ScenarioCache.topic_key == topic_key,
+        ScenarioCache.prompt_version == prompt.PROMPT_VERSION,
+        ScenarioCache.created_at >= fresh_after
+    )
+
+def get_cached_scenario(topic):
+    """변형이 충분히 쌓인 주제면 그 중 하나를 무작위로 반환, 아니면 None"""
+    entries = scenario_cache_query(normalize_topic(topic)).all()
+    if len(entries) < app.config['SCENARIO_CACHE_VARIANTS']:
+        return None
+
+    entry = random.choice(entries)
+    entry.last_used_at = datetime.utcnow()
+    entry.hit_count += 1
+    db.session.commit()
+    return json.loads(entry.content)
+
+def store_scenario(topic, scenario):
+    """situation_job 완료 후 결과를 캐시에 저장하고 오래된 항목을 정리"""
+    topic_key = normalize_topic(topic)
+    db.session.add(ScenarioCache(
+        topic_key=topic_key,
+        prompt_version=prompt.PROMPT_VERSION,
+        content=json.dumps(scenario, ensure_ascii=False)
+    ))
+    db.session.flush()
+
+    # 1. 주제별로 최근 사용된 변형만 남김 (강제 재생성 시 가장 오래 안 쓰인 변형 교체)
+    stale_variants = scenario_cache_query(topic_key) \
+        .order_by(ScenarioCache.last_used_at.desc()) \
+        .offset(app.config['SCENARIO_CACHE_VARIANTS']).all()
+    for entry in stale_variants:
+        db.session.delete(entry)
+
+    # 2. TTL 만료 항목 및 이전 프롬프트 버전 삭제
+    fresh_after = datetime.utcnow() - timedelta(seconds=app.config['SCENARIO_CACHE_TTL'])
+    ScenarioCache.query.filter(db.or_(
+        ScenarioCache.created_at < fresh_after,
+        ScenarioCache.prompt_version != prompt.PROMPT_VERSION
+    )).delete(synchronize_session=False)
+
+    # 3. 전체 행 수 제한 (LRU)
+    lru_ids = db.session.query(ScenarioCache.id) \
+        .order_by(ScenarioCache.last_used_at.desc()) \
+        .offset(app.config['SCENARIO_CACHE_MAX_ROWS']).all()
+    if lru_ids:
+        ScenarioCache.query.filter(ScenarioCache.id.in_([row.id for row in lru_ids])) \
+            .delete(synchronize_session=False)
+
+    db.session.commit()
+    return scenario
+
+# ===========================
+# AI 잡 (OS 스레드에서 실행되므로 DB 접근 금지)
+# ===========================
+def situation_job(topic):
+    return parse_situation(prompt.generate_situation(topic))
+
+def situations_job(topics):
+    return parse_situations(prompt.generate_situations(topics), topics)
+
+def selection_job(question, options_list):
+    options_dict = {
+        k:v
+        for k, v in enumerate(options_list)
+    }
+    return parse_selection(prompt_for_selection.generate_selection(question, str(options_dict)))
+
+def draft_generated(classroom_id, topic, scenario):
+    """situation_job 완료 후: 캐시에 저장하고 AI 선택을 미리 요청"""
+    store_scenario(topic, scenario)
+    prefetch_selection(classroom_id, scenario['question'], scenario['options'])
+    return scenario
+
+def save_drafts(classroom_id, scenarios):
+    """situations_job 완료 후: 주제별 초안을 저장하고 단일 주제 캐시에도 넣음"""
+    for scenario in scenarios:
+        db.session.add(PollDraft(
+            classroom_id=classroom_id,
+            topic=scenario['topic'],
+            question=scenario['question'],
+            options=json.dumps(scenario['options'], ensure_ascii=False)
+        ))
+        store_scenario(scenario['topic'], {'question': scenario['question'], 'options': scenario['options']})
+    bump_classroom_version(classroom_id)
+    db.session.commit()
+    return {'count': len(scenarios)}
+
+# ===========================
+# 학생 의견 요약
+# 요약에 반영된 시각 이후 변경된 투표만 모델에 보내 기존 요약을 갱신
+# ===========================
+def summary_entries(poll, options, since=None):
+    """
+    Poll 버전 since 이후에 저장된 투표의 의견 목록과 그 중 가장 큰 버전
+    Vote.updated_at 은 커밋 전에 기록되어 커밋 순서와 다를 수 있으므로,
+    Poll 행 잠금으로 커밋 순서대로 올라가는 Vote.poll_version 으로 구분
+    """
+    query = db.session.query(Vote.option_index, Vote.evidence, Vote.ai_opinion, Vote.poll_version) \
+        .filter(Vote.poll_id == poll.id)
+    if since is not None:
+        query = query.filter(Vote.poll_version > since)
+    rows = query.order_by(Vote.poll_version, Vote.id).all()
+
+    entries = [
+        f"선택: {options[row.option_index] if row.option_index < len(options) else row.option_index}"
+        f" / 이유: {row.evidence} / AI에게: {row.ai_opinion}"
+        for row in rows
+    ]
+    through = max((row.poll_version for row in rows if row.poll_version is not None), default=since)
+    return entries, through
+
+def save_summary(poll_id, version, vote_count, through, summary_text):
+    """요약 잡 완료 후 저장 (더 최신 버전의 요약이 이미 있으면 유지)"""
+    summary = db.session.get(PollSummary, poll_id)
+    if summary is None:
+        summary = PollSummary(poll_id=poll_id)
+        db.session.add(summary)
+    elif summary.version > version:
+        return summary.to_dict()
+    summary.version = version
+    summary.vote_count = vote_count
+    summary.summary = summary_text
+    summary.through_version = through
+    summary.updated_at = datetime.utcnow()
+    db.session.commit()
+    return summary.to_dict()
+
+# ===========================
+# AI 선택 프리페치
+# 교수자가 초안을 검토하는 동안 같은 질문/선택지로 generate_selection 을 미리 실행
+# ===========================
+def selection_key(question, options_list):
+    payload = json.dumps([question.strip(), [option.strip() for option in options_list]],
+                         ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def prefetch_selection(classroom_id, question, options_list):
+    ai_jobs.prefetch(selection_key(question, options_list), 'selection_prefetch',
+                     selection_job, question, options_list,
+                     meta={'classroom_id': classroom_id, 'question': question, 'options': options_list})
+
+def find_prefetched_selection(classroom_id, question, options_list):
+    """
+    최종 제출된 질문/선택지에 맞는 프리페치 잡을 찾음
+    그대로 제출했으면 해시로, 조금 수정했으면 유사도로 찾고 없으면 None
+    """
+    job = ai_jobs.get_prefetched(selection_key(question, options_list))
+    if job is not None:
+        return job
+
+    threshold = app.config['SELECTION_PREFETCH_SIMILARITY']
+    def similar(a, b):
+        return difflib.SequenceMatcher(None, a.strip(), b.strip()).ratio() >= threshold
+
+    for _, job, meta in ai_jobs.iter_prefetched():
+        if meta['classroom_id'] != classroom_id or len(meta['options']) != len(options_list):
+            continue
+        if similar(meta['question'], question) and all(
+            similar(a, b) for a, b in zip(meta['options'], options_list)
+        ):
+            return job
+    return None
+
+def save_poll(classroom_id, question, options_list, selection, draft_id=None):
+    """selection_job 완료 후 앱 컨텍스트에서 Poll 저장 및 알림 (초안에서 만든 경우 초안 삭제)"""
+    poll = Poll(
+        classroom_id=classroom_id,
+        question=question,
+        options=json.dumps(options_list, ensure_ascii=False),
+        ai_option=selection['ai_option'],
+        ai_evidence=selection['ai_evidence']
+    )
+    db.session.add(poll)
+    db.session.flush()
+    for i in range(len(options_list)):
+        db.session.add(PollTally(poll_id=poll.id, option_index=i, count=0))
+    if draft_id:
+        PollDraft.query.filter_by(id=draft_id, classroom_id=classroom_id).delete(synchronize_session=False)
+    bump_classroom_version(classroom_id)
+    db.session.commit()
+
+    # 클라이언트가 새로고침 없이 목록에 추가할 수 있도록 요약 정보를 함께 전송
+    metrics.observe_emit(socketio, 'new_poll', f'classroom_{classroom_id}')
+    socketio.emit('new_poll', poll_summary(poll), room=f'classroom_{classroom_id}')
+
+    return {'poll_id': poll.id, 'question': question}
+
+# ===========================
+# 조건부 GET (ETag) / 조각 캐시
+# ===========================
+def _template_digest():
+    # 배포로 템플릿이 바뀌면 이전 ETag 가 모두 무효가 되도록 템플릿 내용을 ETag 에 포함
+    digest = hashlib.sha1()
+    folder = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), 'rb') as f:
+            digest.update(name.encode('utf-8') + f.read())
+    return digest.hexdigest()
+
+TEMPLATE_DIGEST = _template_digest()
+
+def row_key(row):
+    """캐시 키/ETag 에 쓰는 행 식별값 (SQLite 는 삭제된 id 를 재사용하므로 생성 시각을 함께 사용)"""
+    return (row.id, str(row.created_at))
+
+def page_etag(*parts):
+    """버전 등 페이지를 결정하는 값 + 사용자 + 쿼리 문자열로 만든 ETag"""
+    key = json.dumps([TEMPLATE_DIGEST, current_user.id, current_user.role, *parts,
+                      sorted(request.args.items(multi=True))], ensure_ascii=False)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def conditional_page(etag, render):
+    """
+    If-None-Match 가 etag 와 같으면 조회/렌더링 없이 304 반환, 아니면 render() 결과에 ETag 를 붙임
+    표시할 flash 메시지가 있으면 페이지 내용이 달라지므로 항상 새로 렌더링하고 ETag 를 붙이지 않음
+    """
+    if session.get('_flashes'):
+        return render()
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def render_poll_list(classroom):
+    polls, next_cursor = poll_page(classroom.id)
+    return Markup(render_template("_poll_list.html", classroom=classroom, polls=polls, next_cursor=next_cursor))
+
+def render_poll_results(poll, options):
+    """결과 영역 HTML 과 poll.html 스크립트의 초기 상태"""
+    results, voters, evidences, opinions, _ = load_poll_results(poll)
+    db.session.commit()  # 집계 행을 새로 채운 경우 저장
+    html = render_template("_poll_results.html", options=options, results=results,
+                           voters=voters, evidences=evidences, opinions=opinions)
+    state = {
+        'version': poll.version,
+        'counts': results,
+        # 투표자 명단은 교수자에게만 제공
+        'voters': list(voters.items()) if current_user.role == "professor" else [],
+        'evidences': list(evidences.items()),
+        'opinions': list(opinions.items()),
+    }
+    return Markup(html), state
+
 # ===========================
 # 라우팅
 # ===========================
@@ -114,7 +967,7 @@ def register():
             flash("이미 존재하는 아이디입니다.", "danger")
             return redirect(url_for("register"))
 
-        hashed_pw = generate_password_hash(password)
+        hashed_pw = hash_password(password)
         new_user = User(username=username, password=hashed_pw, role=role)
         db.session.add(new_user)
         db.session.commit()
@@ -130,7 +983,7 @@ def login():
         password = request.form["password"]
 
         user = User.query.filter_by(username=username).first()
-        if not user or not check_password_hash(user.password, password):
+        if not user or not verify_password(user.password, password):
             flash("아이디 또는 비밀번호가 올바르지 않습니다.", "danger")
             return redirect(url_for("login"))
 
@@ -173,6 +1026,64 @@ def create_classroom():
     flash(f"클래스룸이 생성되었습니다! 코드: {code}", "success")
     return redirect(url_for("dashboard"))
 
+@app.route("/roster/import", methods=["POST"])
+@login_required
+def import_roster():
+    """학생 명단(CSV 파일 또는 붙여넣기) 일괄 등록"""
+    if current_user.role != "professor":
+        flash("권한이 없습니다.", "danger")
+        return redirect(url_for("dashboard"))
+
+    upload = request.files.get("roster_file")
+    if upload and upload.filename:
+        raw = upload.read()
+        try:
+            text = raw.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            # 엑셀에서 저장한 한글 CSV
+            text = raw.decode("cp949", errors="replace")
+    else:
+        text = request.form.get("roster_text", "")
+
+    rows, invalid = parse_roster(text)
+    if len(rows) > app.config['ROSTER_IMPORT_MAX_ROWS']:
+        flash(f"한 번에 최대 {app.config['ROSTER_IMPORT_MAX_ROWS']}명까지 등록할 수 있습니다.", "danger")
+        return redirect(url_for("dashboard"))
+
+    # 입력 안의 중복과 이미 존재하는 아이디 제외 (조회 1회)
+    first_rows = {}
+    for username, password in rows:
+        first_rows.setdefault(username, password)
+    unique_rows = list(first_rows.items())
+    usernames = [username for username, _ in unique_rows]
+    existing = {
+        row.username for row in
+        db.session.query(User.username).filter(User.username.in_(usernames))
+    } if usernames else set()
+    new_rows = [(username, password) for username, password in unique_rows if username not in existing]
+
+    if new_rows:
+        hashes = hash_passwords([password for _, password in new_rows])
+        try:
+            # 한 번의 executemany INSERT
+            db.session.execute(db.insert(User), [
+                {'username': username, 'password': password_hash, 'role': 'student'}
+                for (username, _), password_hash in zip(new_rows, hashes)
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            flash(f"명단 등록 중 오류가 발생했습니다: {e}", "danger")
+            return redirect(url_for("dashboard"))
+
+    message = f"학생 {len(new_rows)}명이 등록되었습니다."
+    if existing:
+        message += f" 이미 존재하는 아이디 {len(existing)}개는 건너뛰었습니다."
+    if invalid:
+        message += f" 형식이 잘못된 줄: {', '.join(map(str, invalid[:10]))}{' 등' if len(invalid) > 10 else ''}"
+    flash(message, "success" if new_rows else "warning")
+    return redirect(url_for("dashboard"))
+
 @app.route("/delete_classroom/<int:classroom_id>", methods=["POST"])
 @login_required
 def delete_classroom(classroom_id):
@@ -184,10 +1095,13 @@ def delete_classroom(classroom_id):
         return redirect(url_for("dashboard"))
 
     try:
-        # 2. 클래스룸 삭제 (Poll, Vote는 모델에 설정된 cascade에 의해 자동 삭제됨)
+        # 2. 하위 Poll, Vote, 집계, 초안을 일괄 삭제한 뒤 클래스룸 삭제
+        name = classroom.name
+        delete_polls(Poll.classroom_id == classroom.id)
+        PollDraft.query.filter_by(classroom_id=classroom.id).delete(synchronize_session=False)
         db.session.delete(classroom)
         db.session.commit()
-        flash(f"클래스룸 '{classroom.name}'과 모든 관련 데이터가 삭제되었습니다.", "success")
+        flash(f"클래스룸 '{name}'과 모든 관련 데이터가 삭제되었습니다.", "success")
     except Exception as e:
         db.session.rollback()
         flash(f"클래스룸 삭제 중 오류가 발생했습니다: {e}", "danger")
@@ -218,19 +1132,72 @@ def classroom_view(classroom_id):
         flash("권한이 없습니다.", "danger")
         return redirect(url_for("dashboard"))
     
-    polls = Poll.query.filter_by(classroom_id=classroom_id).order_by(Poll.created_at.desc()).all()
-    
-    # AI 생성 결과를 템플릿에 전달하기 위한 초기값 설정
-    initial_question = request.args.get('initial_question')
-    initial_options_json = request.args.get('initial_options')
-    initial_options = json.loads(initial_options_json) if initial_options_json else None
-
-    return render_template(
-        "classroom.html", 
-        classroom=classroom, 
-        polls=polls,
-        initial_question=initial_question,
-        initial_options=initial_options
+    def render():
+        # 투표 목록은 클래스룸 버전이 같으면 다시 조회/렌더링하지 않음
+        polls_html = fragment_cache.get_or_render(
+            ('poll_list', *row_key(classroom), classroom.version), partial(render_poll_list, classroom))
+
+        # AI 생성 결과를 템플릿에 전달하기 위한 초기값 설정
+        initial_question = request.args.get('initial_question')
+        initial_options_json = request.args.get('initial_options')
+        initial_options = json.loads(initial_options_json) if initial_options_json else None
+        # JS 없이 제출된 AI 요청이라면 페이지에서 잡 완료를 기다림
+        pending_job = request.args.get('pending_job')
+        # 검토를 기다리는 초안 (교수자만)
+        drafts = []
+        if current_user.role == "professor":
+            drafts = PollDraft.query.filter_by(classroom_id=classroom.id).order_by(PollDraft.id).all()
+
+        return render_template(
+            "classroom.html", 
+            classroom=classroom, 
+            polls_html=polls_html,
+            drafts=drafts,
+            initial_question=initial_question,
+            initial_options=initial_options,
+            pending_job=pending_job
+        )
+
+    return conditional_page(page_etag('classroom', *row_key(classroom), classroom.version), render)
+
+@app.route("/classroom/<int:classroom_id>/polls")
+@login_required
+def classroom_polls(classroom_id):
+    """before 커서보다 오래된 투표 목록 (JSON, 무한 스크롤용)"""
+    classroom = Classroom.query.get_or_404(classroom_id)
+    if current_user.role == "professor" and classroom.professor_id != current_user.id:
+        abort(403)
+
+    try:
+        polls, next_cursor = poll_page(classroom.id, request.args.get('before'))
+    except ValueError:
+        abort(400)
+    return jsonify({
+        'polls': [poll_summary(poll) for poll in polls],
+        'next_cursor': next_cursor,
+    })
+
+@app.route("/classroom/<int:classroom_id>/export")
+@login_required
+def export_classroom(classroom_id):
+    """클래스룸의 전체 투표 결과를 CSV / NDJSON 으로 스트리밍"""
+    classroom = Classroom.query.get_or_404(classroom_id)
+    if current_user.role != "professor" or classroom.professor_id != current_user.id:
+        flash("권한이 없습니다.", "danger")
+        return redirect(url_for("classroom_view", classroom_id=classroom_id))
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        flash("지원하지 않는 내보내기 형식입니다.", "danger")
+        return redirect(url_for("classroom_view", classroom_id=classroom_id))
+
+    serialize, content_type = EXPORT_FORMATS[export_format]
+    filename = f"classroom_{classroom.id}_{datetime.utcnow():%Y%m%d}.{export_format}"
+    # 응답을 보내는 동안에도 DB 세션을 쓸 수 있도록 요청 컨텍스트 유지
+    return Response(
+        stream_with_context(serialize(export_rows(classroom.id))),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
     )
 
 @app.route("/classroom/<int:classroom_id>/create_poll", methods=["POST"])
@@ -244,104 +1211,196 @@ def create_poll(classroom_id):
     # 'create' 버튼을 눌렀을 경우 (AI 생성 요청)
     if request.form.get('action_type') == 'create':
         topic = request.form["topic"]
-        try:
-            ai_response_str = prompt.generate_situation(topic)          
-            output_list = ast.literal_eval(ai_response_str)
-            
-            # AI 결과와 함께 템플릿을 redirect로 전달 (URL 파라미터로 전달)
-            return redirect(url_for(
-                "classroom_view", 
-                classroom_id=classroom_id,
-                initial_question=output_list[0],
-                initial_options=json.dumps(output_list[1:], ensure_ascii=False)
-            ))
-            
-        except Exception as e:
-            # AI 응답 파싱 실패 시 오류 메시지 출력 (e.g., SyntaxError, ValueError)
-            flash(f"AI 응답 파싱 실패 또는 생성 중 오류가 발생했습니다. (오류: {e})", "danger")
-            return redirect(url_for("classroom_view", classroom_id=classroom_id))
+        # 같은 주제가 캐시되어 있으면 모델 호출 없이 바로 반환 ("새로 생성" 체크 시 무시)
+        if request.form.get('force_regenerate') != '1':
+            scenario = get_cached_scenario(topic)
+            if scenario is not None:
+                prefetch_selection(classroom_id, scenario['question'], scenario['options'])
+                return draft_ready(classroom_id, scenario)
+
+        job = ai_jobs.submit('situation', situation_job, topic,
+                             owner_id=current_user.id, classroom_id=classroom_id,
+                             on_success=partial(draft_generated, classroom_id, topic))
+        return job_accepted(job, "AI가 투표 초안을 생성하고 있습니다. 잠시만 기다려주세요.")
 
     # 'final' 버튼을 눌렀을 경우 (최종 제출)
     elif request.form.get('action_type') == 'final':
         question = request.form["question"]
         options_list = request.form.getlist("options[]")
-        options_dict = {
-            k:v
-            for k, v in enumerate(options_list)
-        }
-        options_dict_str = str(options_dict)
-        try:
-            ai_option_raw = prompt_for_selection.generate_selection(question, options_dict_str)
-            # AI 출력 정리 (예: ``` 제거, 줄바꿈 제거)
-            cleaned = ai_option_raw.strip().replace("```", "").replace("\n", "")
-            ai_output_list = ast.literal_eval(cleaned)
-            
-            poll = Poll(
-                classroom_id=classroom_id,
-                question=question,
-                options=json.dumps(options_list, ensure_ascii=False),
-                ai_option=ai_output_list[0],
-                ai_evidence=ai_output_list[1]
-            )
-            db.session.add(poll)
-            db.session.commit()
-            
-            socketio.emit('new_poll', {
-                'poll_id': poll.id,
-                'question': question
-            }, room=f'classroom_{classroom_id}')
-            
-            flash("투표가 생성되었습니다!", "success")
-            return redirect(url_for("classroom_view", classroom_id=classroom_id))
-        except Exception as e:
-            flash(f"AI 응답 파싱 실패 또는 생성 중 오류가 발생했습니다. (오류: {e})", "danger")
-            return redirect(url_for("classroom_view", classroom_id=classroom_id))
-    
+        # 초안 검토 중 미리 받아 둔 AI 선택이 있으면 모델을 다시 호출하지 않음
+        prefetched = find_prefetched_selection(classroom_id, question, options_list)
+        draft_id = request.form.get('draft_id', type=int)
+        job = ai_jobs.submit('poll', selection_job, question, options_list,
+                             owner_id=current_user.id, classroom_id=classroom_id,
+                             on_success=partial(save_poll, classroom_id, question, options_list,
+                                                draft_id=draft_id),
+                             reuse=prefetched)
+        return job_accepted(job, "AI가 선택지를 고르고 있습니다. 완료되면 투표가 생성됩니다.")
+
     # 폼에서 아무 버튼도 눌리지 않은 경우
     return redirect(url_for("classroom_view", classroom_id=classroom_id))
 
+@app.route("/classroom/<int:classroom_id>/drafts", methods=["POST"])
+@login_required
+def create_drafts(classroom_id):
+    """여러 주제의 투표 초안을 한 번의 AI 호출로 생성"""
+    classroom = Classroom.query.get_or_404(classroom_id)
+    if current_user.role != "professor" or classroom.professor_id != current_user.id:
+        flash("권한이 없습니다.", "danger")
+        return redirect(url_for("classroom_view", classroom_id=classroom_id))
+
+    # 한 줄에 주제 하나, 중복/빈 줄 제외
+    topics = list(dict.fromkeys(
+        line.strip()[:200] for line in request.form.get("topics", "").splitlines() if line.strip()
+    ))
+    max_topics = app.config['BULK_DRAFT_MAX_TOPICS']
+    if not topics or len(topics) > max_topics:
+        flash(f"주제를 1개 이상 {max_topics}개 이하로 입력해주세요.", "warning")
+        return redirect(url_for("classroom_view", classroom_id=classroom_id))
+
+    job = ai_jobs.submit('situation_batch', situations_job, topics,
+                         owner_id=current_user.id, classroom_id=classroom_id,
+                         on_success=partial(save_drafts, classroom_id))
+    return job_accepted(job, f"AI가 주제 {len(topics)}개의 초안을 생성하고 있습니다. 잠시만 기다려주세요.")
+
+@app.route("/drafts/<int:draft_id>/delete", methods=["POST"])
+@login_required
+def delete_draft(draft_id):
+    draft = PollDraft.query.get_or_404(draft_id)
+    classroom = Classroom.query.get_or_404(draft.classroom_id)
+    if current_user.role != "professor" or classroom.professor_id != current_user.id:
+        flash("권한이 없습니다.", "danger")
+        return redirect(url_for("classroom_view", classroom_id=classroom.id))
+
+    db.session.delete(draft)
+    bump_classroom_version(classroom.id)
+    db.session.commit()
+    flash("초안이 삭제되었습니다.", "success")
+    return redirect(url_for("classroom_view", classroom_id=classroom.id))
+
+def job_accepted(job, message, redirect_url=None):
+    """잡 등록 직후 응답: fetch 요청이면 job id(JSON), 아니면 클래스룸(또는 redirect_url)으로 redirect"""
+    if wants_json():
+        return jsonify({
+            'job_id': job.id,
+            'status_url': url_for('job_status', job_id=job.id)
+        }), 202
+    flash(message, "info")
+    return redirect(redirect_url or url_for("classroom_view", classroom_id=job.classroom_id, pending_job=job.id))
+
+def draft_ready(classroom_id, scenario):
+    """캐시된 초안을 잡 결과와 같은 형태로 즉시 응답"""
+    if wants_json():
+        return jsonify({'job_id': None, 'kind': 'situation', 'status': 'done', 'result': scenario})
+    return redirect(url_for(
+        "classroom_view",
+        classroom_id=classroom_id,
+        initial_question=scenario['question'],
+        initial_options=json.dumps(scenario['options'], ensure_ascii=False)
+    ))
+
+@app.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    job = ai_jobs.get(job_id)
+    if job is None or job.owner_id != current_user.id:
+        abort(404)
+    return jsonify(job.to_dict())
+
 @app.route("/poll/<int:poll_id>")
 @login_required
 def poll_view(poll_id):
     poll = Poll.query.get_or_404(poll_id)
-    classroom = Classroom.query.get(poll.classroom_id)
-    
-    options = json.loads(poll.options)
-    existing_vote = Vote.query.filter_by(poll_id=poll_id, user_id=current_user.id).first()
-    
-    votes = Vote.query.filter_by(poll_id=poll_id).all()
-    results = {}
-    voters = {}
-    evidences = {}
-    opinions = {}
 
-    if poll.ai_option not in results:
-        results[poll.ai_option] = 0
-        voters[poll.ai_option] = []
-    results[poll.ai_option] += 1
-    voters[poll.ai_option].append('AI')
-    evidences['AI'] = poll.ai_evidence
+    def render():
+        classroom = Classroom.query.get(poll.classroom_id)
+        options = json.loads(poll.options)
+        # 결과 영역은 Poll 버전이 같으면 다시 조회/렌더링하지 않음 (투표자 명단 때문에 역할별로 구분)
+        results_html, poll_state = fragment_cache.get_or_render(
+            ('poll_results', *row_key(poll), poll.version, current_user.role),
+            partial(render_poll_results, poll, options))
+        existing_vote = None
+        if current_user.role == "student":
+            # 아직 저장되지 않은 본인 투표가 있으면 그것을 보여줌 (VOTE_INGEST_MODE=buffered)
+            existing_vote = vote_buffer.pending_vote(poll.id, current_user.id) or \
+                Vote.query.filter_by(poll_id=poll.id, user_id=current_user.id).first()
 
-    for vote in votes:
-        if vote.option_index not in results:
-            results[vote.option_index] = 0
-            voters[vote.option_index] = []
-            evidences[vote.user.username] = None
-            opinions[vote.user.username] = None
-        results[vote.option_index] += 1
-        voters[vote.option_index].append(vote.user.username)
-        evidences[vote.user.username] = vote.evidence
-        opinions[vote.user.username] = vote.ai_opinion
-    
-    return render_template("poll.html", 
-                           poll=poll, 
-                           classroom=classroom,
-                           options=options, 
-                           existing_vote=existing_vote,
-                           results=results,
-                           voters=voters,
-                           evidences=evidences,
-                           opinions=opinions)
+        return render_template("poll.html", 
+                               poll=poll, 
+                               classroom=classroom,
+                               options=options, 
+                               existing_vote=existing_vote,
+                               results_html=results_html,
+                               poll_state=poll_state,
+                               summary=summary)
+
+    # 교수자 화면에는 의견 요약이 포함되므로 요약이 갱신되면 ETag 도 바뀌어야 함
+    summary = db.session.get(PollSummary, poll.id) if current_user.role == "professor" else None
+    summary_stamp = summary.updated_at.isoformat() if summary else None
+    return conditional_page(page_etag('poll', *row_key(poll), poll.version, summary_stamp), render)
+
+@app.route("/poll/<int:poll_id>/summary", methods=["POST"])
+@login_required
+def summarize_poll(poll_id):
+    """학생 의견 요약 (Poll 버전이 요약과 같으면 저장된 요약, 아니면 새 투표만으로 갱신하는 잡 등록)"""
+    poll = Poll.query.get_or_404(poll_id)
+    classroom = Classroom.query.get_or_404(poll.classroom_id)
+    if current_user.role != "professor" or classroom.professor_id != current_user.id:
+        flash("권한이 없습니다.", "danger")
+        return redirect(url_for("poll_view", poll_id=poll_id))
+
+    summary = db.session.get(PollSummary, poll.id)
+    entries, through = [], None
+    if summary is None or summary.version != poll.version:
+        options = json.loads(poll.options)
+        # through_version 이 없는 (이전 방식으로 만든) 요약은 처음부터 다시 요약
+        previous = summary if summary and summary.through_version is not None else None
+        entries, through = summary_entries(poll, options, previous.through_version if previous else None)
+
+    if not entries:
+        # 새로 반영할 의견이 없으면 모델을 호출하지 않음
+        if summary is None:
+            if wants_json():
+                return jsonify({'job_id': None, 'kind': 'summary', 'status': 'failed',
+                                'error': '아직 요약할 투표가 없습니다.'})
+            flash("아직 요약할 투표가 없습니다.", "warning")
+            return redirect(url_for("poll_view", poll_id=poll_id))
+        if summary.version != poll.version:
+            summary.version = poll.version
+            db.session.commit()
+        if wants_json():
+            return jsonify({'job_id': None, 'kind': 'summary', 'status': 'done', 'result': summary.to_dict()})
+        return redirect(url_for("poll_view", poll_id=poll_id))
+
+    vote_count = Vote.query.filter_by(poll_id=poll.id).count()
+    job = ai_jobs.submit('summary', prompt_for_summary.summarize_feedback,
+                         poll.question, options, entries, previous.summary if previous else None,
+                         owner_id=current_user.id, classroom_id=classroom.id,
+                         on_success=partial(save_summary, poll.id, poll.version, vote_count, through))
+    return job_accepted(job, "AI가 학생 의견을 요약하고 있습니다. 잠시 후 새로고침해주세요.",
+                        redirect_url=url_for("poll_view", poll_id=poll_id))
+
+@app.route("/poll/<int:poll_id>/results")
+@login_required
+def poll_results(poll_id):
+    """집계 테이블 기반 투표 결과 (JSON)"""
+    poll = Poll.query.get_or_404(poll_id)
+    results, voters, evidences, opinions, _ = load_poll_results(poll)
+    db.session.commit()
+
+    data = {
+        'poll_id': poll.id,
+        'version': poll.version,
+        'counts': {str(k): v for k, v in results.items()},
+        'total': sum(results.values()),
+        # 투표 순서를 유지하기 위해 [이름, 내용] 목록으로 전달 (JSON 객체는 키가 정렬됨)
+        'evidences': list(evidences.items()),
+        'opinions': list(opinions.items()),
+    }
+    # 투표자 명단은 교수자에게만 제공 (poll.html 과 동일)
+    if current_user.role == "professor":
+        data['voters'] = list(voters.items())
+    return jsonify(data)
 
 @app.route("/delete_poll/<int:poll_id>", methods=["POST"])
 @login_required
@@ -355,10 +1414,11 @@ def delete_poll(poll_id):
         return redirect(url_for("classroom_view", classroom_id=classroom.id))
 
     try:
-        # 2. Poll 삭제 (Vote는 모델에 설정된 cascade에 의해 자동 삭제됨)
-        db.session.delete(poll)
+        # 2. Poll 과 하위 Vote, 집계를 일괄 삭제
+        delete_polls(Poll.id == poll_id)
+        bump_classroom_version(classroom.id)
         db.session.commit()
-        flash(f"투표 '{poll.id}'과 모든 관련 데이터가 삭제되었습니다.", "success")
+        flash(f"투표 '{poll_id}'과 모든 관련 데이터가 삭제되었습니다.", "success")
     except Exception as e:
         db.session.rollback()
         flash(f"투표 삭제 중 오류가 발생했습니다: {e}", "danger")
@@ -372,49 +1432,83 @@ def submit_vote(poll_id):
     option_index = int(request.form["option"])
     evidence = str(request.form["evidence"])
     ai_opinion = str(request.form["ai_opinion"])
+    if not 0 <= option_index < len(json.loads(poll.options)):
+        abort(400)
+
+    if app.config['VOTE_INGEST_MODE'] == 'buffered':
+        # 메모리 큐에 넣고 바로 응답 (VoteBuffer 가 모아서 저장 후 vote_update 전송)
+        vote_buffer.submit({
+            'poll_id': poll_id,
+            'user_id': current_user.id,
+            'username': current_user.username,
+            'option_index': option_index,
+            'evidence': evidence,
+            'ai_opinion': ai_opinion,
+        })
+        flash("투표가 완료되었습니다!", "success")
+        return redirect(url_for("poll_view", poll_id=poll_id))
     
-    existing_vote = Vote.query.filter_by(poll_id=poll_id, user_id=current_user.id).first()
+    ensure_tally(poll)
+    # 커밋 후 poll.version 을 다시 읽으면 그 사이 커밋된 다른 투표의 버전이 보일 수 있으므로
+    # 같은 UPDATE 문에서 이 투표가 올린 버전을 받아 둠 (Vote 에도 기록)
+    version = db.session.execute(
+        db.update(Poll).where(Poll.id == poll_id)
+        .values(version=Poll.version + 1).returning(Poll.version)
+    ).scalar_one()
+    previous_option = upsert_vote(poll_id, current_user.id, option_index, evidence, ai_opinion, version)
     
-    if existing_vote:
-        existing_vote.option_index = option_index
-        existing_vote.evidence = evidence
-        existing_vote.ai_opinion = ai_opinion
-
-    else:
-        vote = Vote(poll_id=poll_id, user_id=current_user.id, option_index=option_index,
-                    evidence=evidence, ai_opinion=ai_opinion)
-        db.session.add(vote)
+    # 선택지를 바꾼 경우 이전 선택지 -1, 새 선택지 +1
+    if previous_option != option_index:
+        if previous_option is not None:
+            adjust_tally(poll_id, previous_option, -1)
+        adjust_tally(poll_id, option_index, 1)
+    # 득표 수도 커밋 전에 읽어서 이 버전 시점의 값을 보냄
+    counts = tally_counts(poll)
     
     db.session.commit()
     
-    socketio.emit('vote_update', {
-        'poll_id': poll_id,
-        'user': current_user.username,
-        'option': option_index,
-        'evidence':evidence,
-        'ai_opinion':ai_opinion
-    }, room=f'classroom_{poll.classroom_id}')
+    schedule_vote_update(poll, version, counts, current_user.username, option_index,
+                         previous_option, evidence, ai_opinion)
     
     flash("투표가 완료되었습니다!", "success")
     return redirect(url_for("poll_view", poll_id=poll_id))
 
+@app.route("/metrics")
+def metrics_view():
+    """Prometheus 형식 지표 (METRICS_TOKEN 설정 시 Bearer 토큰 필요)"""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401)
+    return metrics.REGISTRY.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 @socketio.on('join')
 def on_join(data):
     if current_user.is_authenticated:
         room = f"classroom_{data['classroom_id']}"
         join_room(room)
+        # 담당 교수자는 AI 잡 결과를 받기 위한 전용 방에도 입장
+        if current_user.role == "professor":
+            classroom = Classroom.query.get(int(data['classroom_id']))
+            if classroom and classroom.professor_id == current_user.id:
+                join_room(f"{room}_professor")
 
 @socketio.on('leave')
 def on_leave(data):
     room = f"classroom_{data['classroom_id']}"
     leave_room(room)
+    leave_room(f"{room}_professor")
+
+@app.cli.command("upgrade-db")
+def upgrade_db():
+    """테이블 생성 및 스키마 마이그레이션 (배포 시 release 단계에서 실행)"""
+    migrations.upgrade(db)
 
 # ===========================
 # 앱 실행
 # ===========================
 if __name__ == "__main__":
     with app.app_context():
-        # 데이터베이스가 없으면 생성
-        db.create_all()
+        # 데이터베이스가 없으면 생성하고 스키마를 최신으로 맞춤
+        migrations.upgrade(db)
     # 로컬 테스트 시 디버그 모드 사용
     socketio.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 5000)), debug=True)
@@ -0,0 +1,100 @@
+"""
+방(room)별 Socket.IO 브로드캐스트 묶음 전송
+
+투표가 몰리면 submit_vote 마다 클래스룸 전체에 이벤트를 보내게 되어
+전송량이 (투표 수 x 방 인원) 으로 늘어난다.
+같은 방/이벤트의 메시지를 짧은 시간(window) 동안 모아 '<event>_batch' 하나로 보낸다.
+
+- 최근 window 안에 보낸 적이 없는(한가한) 방은 지연 없이 바로 전송
+- 그 외에는 window 가 끝날 때 모인 메시지를 한 번에 전송
+따라서 방 하나당 전송 횟수는 window 당 최대 1회로 제한된다.
+"""
+import time
+import threading
+
+import metrics
+
+
+class _RoomBuffer:
+    def __init__(self):
+        self.items = []
+        self.last_emit = 0.0
+        self.flush_scheduled = False
+
+
+class BroadcastScheduler:
+    """
+    설정값
+      BROADCAST_WINDOW_MS : 묶음 전송 간격(ms), 0 이면 묶지 않고 바로 전송
+    """
+
+    def __init__(self, app=None, socketio=None):
+        self.socketio = None
+        self.window = 0.0
+        self._buffers = {}
+        self._lock = threading.Lock()
+        # 묶음 전송 통계
+        self.scheduled = 0   # 요청된 메시지 수
+        self.emitted = 0     # 실제 전송된 이벤트 수
+        self.max_batch = 0   # 한 번에 묶인 최대 메시지 수
+        if app is not None:
+            self.init_app(app, socketio)
+
+    def init_app(self, app, socketio):
+        app.config.setdefault('BROADCAST_WINDOW_MS', 150)
+        self.socketio = socketio
+        self.window = app.config['BROADCAST_WINDOW_MS'] / 1000
+        app.extensions['broadcast'] = self
+
+    def schedule(self, event, payload, room):
+        key = (room, event)
+        with self._lock:
+            self.scheduled += 1
+            buf = self._buffers.setdefault(key, _RoomBuffer())
+            buf.items.append(payload)
+            if buf.flush_scheduled:
+                return
+            buf.flush_scheduled = True
+            wait = buf.last_emit + self.window - time.monotonic()
+
+        if wait <= 0:
+            self._flush(key)
+        else:
+            self.socketio.start_background_task(self._flush_later, key, wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'window_ms': self.window * 1000,
+                'scheduled': self.scheduled,
+                'emitted': self.emitted,
+                'coalesced': self.scheduled - self.emitted,
+                'max_batch': self.max_batch,
+                'pending': sum(len(buf.items) for buf in self._buffers.values()),
+            }
+
+    def _flush_later(self, key, wait):
+        self.socketio.sleep(wait)
+        self._flush(key)
+
+    def _flush(self, key):
+        room, event = key
+        now = time.monotonic()
+        with self._lock:
+            buf = self._buffers[key]
+            items, buf.items = buf.items, []
+            buf.flush_scheduled = False
+            buf.last_emit = now
+            self.emitted += 1
+            self.max_batch = max(self.max_batch, len(items))
+            self._prune(now)
+
+        metrics.observe_emit(self.socketio, f'{event}_batch', room)
+        self.socketio.emit(f'{event}_batch', {'events': items}, room=room)
+
+    def _prune(self, now):
+        # 한동안 전송이 없는 방의 버퍼 정리
+        idle = [key for key, buf in self._buffers.items()
+                if not buf.flush_scheduled and now - buf.last_emit > 60]
+        for key in idle:
+            del self._buffers[key]
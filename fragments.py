@@ -0,0 +1,40 @@
+"""
+렌더링된 템플릿 조각 캐시
+
+classroom_view 의 투표 목록, poll_view 의 결과 영역처럼 자주 다시 그려지는 부분을
+(대상 id, 생성 시각, 버전, ...) 키로 메모리에 보관한다. 내용이 바뀌면 버전이 올라가 키가 달라지므로
+따로 무효화할 필요 없이 오래된 항목은 LRU 로 밀려난다.
+생성 시각은 SQLite 가 삭제된 행의 id 를 다시 쓰는 경우 이전 행의 캐시와 구분하기 위해 포함한다.
+"""
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """key 에 해당하는 조각이 있으면 반환, 없으면 render() 결과를 저장 후 반환"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
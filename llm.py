@@ -0,0 +1,196 @@
+"""
+LLM 호출 공통 모듈 (prompt.py, prompt_for_selection.py 에서 사용)
+
+- SDK(google.generativeai)는 첫 호출 시점에 import/초기화하고 클라이언트를 재사용
+- 호출마다 제한 시간을 두고, 일시적인 오류는 지수 백오프로 재시도
+- LLM_PROVIDER=fake 로 설정하면 네트워크 없이 결정적인 응답을 돌려주는 로컬 가짜 모델 사용
+  (테스트, 부하 테스트, 오프라인 개발용)
+
+환경 변수
+  LLM_PROVIDER       : gemini(기본) / fake
+  LLM_MODEL          : Gemini 모델 이름
+  LLM_TIMEOUT        : 호출 1회 제한 시간(초)
+  LLM_MAX_RETRIES    : 재시도 횟수
+  LLM_FAKE_LATENCY_MS: fake 모델의 인위적인 응답 지연(ms)
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProvider:
+    """모든 모델 제공자가 구현하는 인터페이스 (_generate 를 구현)"""
+    name = None
+
+    def generate(self, prompt, *, kind=None, json_output=False):
+        """
+        prompt 에 대한 응답 텍스트를 반환. kind 는 호출 종류('situation', 'selection' 등)
+        json_output=True 면 모델에 JSON 형식 응답을 요청 (지원하는 제공자만)
+        """
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            text, usage = self._generate(prompt, kind=kind, json_output=json_output)
+            outcome = 'ok'
+        finally:
+            metrics.LLM_REQUEST_DURATION.observe(time.perf_counter() - started,
+                                                 provider=self.name, kind=kind, outcome=outcome)
+        for token_type, count in usage.items():
+            metrics.LLM_TOKENS.inc(count, provider=self.name, kind=kind, type=token_type)
+        return text
+
+    def _generate(self, prompt, *, kind=None, json_output=False):
+        """(응답 텍스트, {'prompt': 입력 토큰 수, 'completion': 출력 토큰 수}) 반환"""
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+
+    def __init__(self, model_name, timeout=15, max_retries=2, backoff=1.0):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # SDK import 비용이 커서 실제로 필요할 때 한 번만 불러옴
+                    import google.generativeai as genai
+                    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _retryable(self, error):
+        from google.api_core import exceptions
+        return isinstance(error, (
+            exceptions.TooManyRequests,
+            exceptions.ServiceUnavailable,
+            exceptions.DeadlineExceeded,
+            exceptions.InternalServerError,
+            TimeoutError,
+            ConnectionError,
+        ))
+
+    def _generate(self, prompt, *, kind=None, json_output=False):
+        model = self._get_model()
+        generation_config = {'response_mime_type': 'application/json'} if json_output else None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = model.generate_content(prompt, generation_config=generation_config,
+                                                  request_options={'timeout': self.timeout})
+                usage = getattr(response, 'usage_metadata', None)
+                return response.text, {
+                    'prompt': getattr(usage, 'prompt_token_count', 0) or 0,
+                    'completion': getattr(usage, 'candidates_token_count', 0) or 0,
+                }
+            except Exception as e:
+                if attempt == self.max_retries or not self._retryable(e):
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning("Gemini 호출 실패 (%s), %.1f초 후 재시도", e, delay)
+                time.sleep(delay)
+
+
+class FakeProvider(LLMProvider):
+    """프롬프트 해시로 응답을 정하는 결정적인 가짜 모델"""
+    name = 'fake'
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def _generate(self, prompt, *, kind=None, json_output=False):
+        text = self._respond(prompt, kind)
+        # 토큰 수는 글자 수로 대략 계산
+        return text, {'prompt': len(prompt), 'completion': len(text)}
+
+    def _respond(self, prompt, kind):
+        if self.latency:
+            time.sleep(self.latency)
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        tag = format(digest % 10000, '04d')
+
+        if kind == 'situation':
+            return str([
+                f'[테스트 상황 {tag}] 친구와 약속한 시간에 다른 친구가 도움을 요청했어. 너는 어떻게 할까?',
+                '약속한 친구에게 사정을 설명하고 양해를 구한다.',
+                '도움을 요청한 친구에게 다른 시간에 돕겠다고 말한다.',
+                '아무에게도 말하지 않고 더 편한 쪽을 선택한다.',
+                '둘 다 모른 척하고 집에 간다.',
+            ])
+        if kind == 'situation_batch':
+            # prompt.generate_situations 의 마지막 '주제 목록:' 줄(예시 다음)에서 주제를 읽어 주제마다 상황 하나씩 생성
+            # (실제 모델처럼 ```json 코드 블록으로 감싸서 반환)
+            line = [line for line in prompt.splitlines() if line.strip().startswith('주제 목록:')][-1]
+            topics = json.loads(line.split(':', 1)[1])
+            scenarios = [{
+                'topic': topic,
+                'situation': f'[테스트 상황 {tag}-{i}] "{topic}" 상황에서 친구가 곤란해하고 있어. 너는 어떻게 할까?',
+                'options': [
+                    '친구의 이야기를 먼저 들어본다.',
+                    '친구의 입장에서 도울 방법을 함께 찾는다.',
+                    '내 일이 바쁘니 나중에 생각한다.',
+                    '모른 척하고 지나간다.',
+                ],
+            } for i, topic in enumerate(topics)]
+            return '```json\n' + json.dumps(scenarios, ensure_ascii=False, indent=2) + '\n```'
+        if kind == 'summary':
+            # 새 의견 수만큼 줄을 더한 요약 (기존 요약이 있으면 이어 붙임)
+            previous, feedback = prompt.split('기존 요약:', 1)[1].split('새 의견:', 1)
+            previous = previous.strip()
+            count = sum(1 for line in feedback.splitlines() if line.strip().startswith('- '))
+            lines = [] if previous == '(없음)' else [previous]
+            lines.append(f'- [테스트 요약 {tag}] 새 의견 {count}개 반영')
+            return '\n'.join(lines)
+        if kind == 'selection':
+            # 선택지는 최소 2개이므로 0, 1 중에서 선택
+            return str([digest % 2, f'[테스트 이유 {tag}] 나한테 제일 편한 선택이니까.'])
+        return f'[테스트 응답 {tag}]'
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """설정에 맞는 LLMProvider 를 만들어 프로세스 안에서 재사용"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _create_provider()
+    return _provider
+
+
+def set_provider(provider):
+    """테스트/부하 테스트에서 사용할 제공자를 직접 지정"""
+    global _provider
+    _provider = provider
+
+
+def _create_provider():
+    name = os.getenv("LLM_PROVIDER", "gemini")
+    if name == "fake":
+        return FakeProvider(latency=int(os.getenv("LLM_FAKE_LATENCY_MS", 0)) / 1000)
+    if name == "gemini":
+        return GeminiProvider(
+            os.getenv("LLM_MODEL", "gemini-2.5-flash-lite"),
+            timeout=float(os.getenv("LLM_TIMEOUT", 15)),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", 2)),
+        )
+    raise ValueError(f"알 수 없는 LLM_PROVIDER: {name}")
@@ -0,0 +1,285 @@
+"""
+클래스룸 부하 테스트 / 벤치마크
+
+여러 클래스룸이 동시에 수업하는 상황을 Flask 테스트 클라이언트와 Flask-SocketIO 테스트 클라이언트로 재현한다.
+  교수자 N명: 회원가입/로그인 -> 클래스룸 생성 -> AI 초안 생성(create) -> 최종 제출(final)
+  클래스룸별 학생 M명: 회원가입/로그인 -> join_classroom -> 소켓 입장 -> submit_vote 동시 제출 -> poll_view 새로고침
+
+LLM 은 llm.FakeProvider 를 사용하므로 네트워크/API 키가 필요 없다.
+DATABASE_URL 을 지정하지 않으면 임시 SQLite 파일을 사용한다 (PostgreSQL 측정 시 DATABASE_URL 지정).
+
+출력: 라우트별 p50/p95/p99 응답 시간, 요청당 쿼리 수, 투표 후 모든 학생에게 업데이트가 도착하기까지의 시간
+
+사용법
+  python loadtest.py --classrooms 3 --students 30 --polls 2 --refreshes 3
+  python loadtest.py --json result.json   # 결과를 JSON 으로도 저장 (회귀 비교용)
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="클래스룸 부하 테스트")
+    parser.add_argument("--classrooms", type=int, default=3, help="교수자(클래스룸) 수")
+    parser.add_argument("--students", type=int, default=30, help="클래스룸당 학생 수")
+    parser.add_argument("--polls", type=int, default=2, help="클래스룸당 생성할 투표 수")
+    parser.add_argument("--refreshes", type=int, default=3, help="투표 후 학생별 poll_view 새로고침 횟수")
+    parser.add_argument("--llm-latency-ms", type=int, default=0, help="가짜 LLM 응답 지연(ms)")
+    parser.add_argument("--fanout-timeout", type=float, default=10.0, help="소켓 업데이트 대기 제한 시간(초)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    return parser.parse_args()
+
+
+def configure_env(args):
+    """app 을 import 하기 전에 테스트용 환경 설정"""
+    os.environ.setdefault("SOCKETIO_ASYNC_MODE", "threading")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.llm_latency_ms)
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+
+def percentile(values, pct):
+    """nearest-rank 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """라우트별 응답 시간과 요청당 쿼리 수 기록"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.fanouts = []
+        self.socket_events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # SQLAlchemy before_cursor_execute 리스너
+    def on_query(self, *args, **kwargs):
+        if getattr(self._local, "active", False):
+            self._local.count += 1
+
+    def call(self, route, fn, *args, **kwargs):
+        self._local.active = True
+        self._local.count = 0
+        started = time.perf_counter()
+        try:
+            response = fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._local.active = False
+        if response.status_code >= 400:
+            raise RuntimeError(f"{route} 실패: HTTP {response.status_code}")
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            self.queries[route].append(self._local.count)
+        return response
+
+    def summary(self):
+        routes = {}
+        for route, values in sorted(self.latencies.items()):
+            queries = self.queries[route]
+            routes[route] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "queries_avg": sum(queries) / len(queries),
+                "queries_max": max(queries),
+            }
+        return {
+            "routes": routes,
+            "fanout": {
+                "count": len(self.fanouts),
+                "p50_ms": percentile(self.fanouts, 50) * 1000,
+                "p95_ms": percentile(self.fanouts, 95) * 1000,
+                "p99_ms": percentile(self.fanouts, 99) * 1000,
+                "events_per_student_avg": (sum(self.socket_events) / len(self.socket_events)
+                                           if self.socket_events else 0),
+            },
+        }
+
+
+class Classroom:
+    """교수자 1명 + 학생 M명으로 수업 한 번을 진행"""
+
+    def __init__(self, app_module, recorder, index, args, run_id):
+        self.m = app_module
+        self.recorder = recorder
+        self.args = args
+        self.prefix = f"lt{run_id}c{index}"
+        self.professor = app_module.app.test_client()
+        self.students = []
+        self.sockets = []
+        self.classroom_id = None
+
+    def register_and_login(self, client, username, role):
+        form = {"username": username, "password": "loadtest-pw", "role": role}
+        self.recorder.call("POST /register", client.post, "/register", data=form)
+        self.recorder.call("POST /login", client.post, "/login", data=form)
+
+    def setup(self):
+        m = self.m
+        self.register_and_login(self.professor, f"{self.prefix}_prof", "professor")
+        self.recorder.call("POST /create_classroom", self.professor.post,
+                           "/create_classroom", data={"name": f"{self.prefix} 수업"})
+        with m.app.app_context():
+            professor = m.User.query.filter_by(username=f"{self.prefix}_prof").one()
+            classroom = m.Classroom.query.filter_by(professor_id=professor.id).one()
+            self.classroom_id, code = classroom.id, classroom.code
+
+        def join(i):
+            client = m.app.test_client()
+            self.register_and_login(client, f"{self.prefix}_s{i}", "student")
+            self.recorder.call("POST /join_classroom", client.post,
+                               "/join_classroom", data={"code": code})
+            self.recorder.call("GET /classroom/<id>", client.get, f"/classroom/{self.classroom_id}")
+            sock = m.socketio.test_client(m.app, flask_test_client=client)
+            sock.emit("join", {"classroom_id": self.classroom_id})
+            return client, sock
+
+        with ThreadPoolExecutor(max_workers=min(self.args.students, 16)) as pool:
+            for client, sock in pool.map(join, range(self.args.students)):
+                self.students.append(client)
+                self.sockets.append(sock)
+
+    def wait_job(self, job_id):
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            job = self.recorder.call("GET /jobs/<id>", self.professor.get, f"/jobs/{job_id}").get_json()
+            if job["status"] == "done":
+                return job["result"]
+            if job["status"] == "failed":
+                raise RuntimeError(f"AI 잡 실패: {job['error']}")
+            time.sleep(0.05)
+        raise RuntimeError("AI 잡 제한 시간 초과")
+
+    def create_poll(self, n):
+        headers = {"X-Requested-With": "XMLHttpRequest"}
+        url = f"/classroom/{self.classroom_id}/create_poll"
+        data = self.recorder.call("POST /classroom/<id>/create_poll (create)", self.professor.post, url,
+                                  data={"action_type": "create", "topic": f"{self.prefix} 주제 {n}",
+                                        "force_regenerate": "1"},
+                                  headers=headers).get_json()
+        draft = self.wait_job(data["job_id"]) if data["job_id"] else data["result"]
+
+        data = self.recorder.call("POST /classroom/<id>/create_poll (final)", self.professor.post, url,
+                                  data={"action_type": "final", "question": draft["question"],
+                                        "options[]": draft["options"]},
+                                  headers=headers).get_json()
+        return self.wait_job(data["job_id"])["poll_id"], len(draft["options"])
+
+    def vote_burst(self, poll_id, option_count):
+        for sock in self.sockets:
+            sock.get_received()  # 이전 이벤트 비우기
+
+        def vote(i):
+            self.recorder.call("POST /poll/<id>/vote", self.students[i].post, f"/poll/{poll_id}/vote",
+                               data={"option": i % option_count,
+                                     "evidence": f"이유 {i}", "ai_opinion": f"한마디 {i}"})
+
+        with ThreadPoolExecutor(max_workers=len(self.students)) as pool:
+            list(pool.map(vote, range(len(self.students))))
+        committed = time.perf_counter()
+
+        # 모든 학생 소켓이 마지막 버전까지 받을 때까지 대기
+        target = len(self.students)
+        seen = [0] * len(self.sockets)
+        events = [0] * len(self.sockets)
+        deadline = committed + self.args.fanout_timeout
+        while min(seen) < target and time.perf_counter() < deadline:
+            for i, sock in enumerate(self.sockets):
+                for packet in sock.get_received():
+                    if packet["name"] != "vote_update_batch":
+                        continue
+                    events[i] += 1
+                    for update in packet["args"][0]["events"]:
+                        if update["poll_id"] == poll_id:
+                            seen[i] = max(seen[i], update["version"])
+            time.sleep(0.001)
+        if min(seen) < target:
+            print(f"[경고] {self.prefix}: 일부 학생이 마지막 업데이트를 받지 못함", file=sys.stderr)
+        with self.recorder._lock:
+            self.recorder.fanouts.append(time.perf_counter() - committed)
+            self.recorder.socket_events.extend(events)
+
+    def refresh(self, poll_id):
+        def view(client):
+            for _ in range(self.args.refreshes):
+                self.recorder.call("GET /poll/<id>", client.get, f"/poll/{poll_id}")
+
+        with ThreadPoolExecutor(max_workers=min(len(self.students), 16)) as pool:
+            list(pool.map(view, self.students))
+
+    def run(self):
+        self.setup()
+        for n in range(self.args.polls):
+            poll_id, option_count = self.create_poll(n)
+            self.vote_burst(poll_id, option_count)
+            self.refresh(poll_id)
+        for sock in self.sockets:
+            sock.disconnect()
+
+
+def print_summary(summary, stats, elapsed):
+    print(f"\n총 소요 시간: {elapsed:.1f}s")
+    print(f"{'route':<45}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'q/req':>8}{'q max':>7}")
+    for route, row in summary["routes"].items():
+        print(f"{route:<45}{row['count']:>7}{row['p50_ms']:>8.1f}ms{row['p95_ms']:>8.1f}ms"
+              f"{row['p99_ms']:>8.1f}ms{row['queries_avg']:>8.1f}{row['queries_max']:>7}")
+    fanout = summary["fanout"]
+    print(f"\n소켓 전파 시간 (투표 완료 -> 전원 수신): p50 {fanout['p50_ms']:.1f}ms, "
+          f"p95 {fanout['p95_ms']:.1f}ms, p99 {fanout['p99_ms']:.1f}ms "
+          f"(학생당 평균 {fanout['events_per_student_avg']:.1f}개 이벤트 수신)")
+    print(f"브로드캐스트 묶음: {stats}")
+
+
+def main():
+    args = parse_args()
+    configure_env(args)
+
+    import app as app_module
+    from sqlalchemy import event
+    import migrations
+
+    recorder = Recorder()
+    with app_module.app.app_context():
+        migrations.upgrade(app_module.db)
+        event.listen(app_module.db.engine, "before_cursor_execute", recorder.on_query)
+
+    run_id = uuid.uuid4().hex[:6]
+    classrooms = [Classroom(app_module, recorder, i, args, run_id) for i in range(args.classrooms)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.classrooms) as pool:
+        for future in [pool.submit(classroom.run) for classroom in classrooms]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    summary = recorder.summary()
+    summary["broadcast"] = app_module.broadcaster.stats()
+    summary["elapsed_s"] = elapsed
+    print_summary(summary, summary["broadcast"], elapsed)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
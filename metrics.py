@@ -0,0 +1,236 @@
+"""
+요청/DB/LLM/Socket.IO 계측 및 Prometheus 텍스트 형식 출력
+
+외부 라이브러리 없이 Counter/Gauge/Histogram 만 간단히 구현했다.
+init_app(app) 을 호출하면
+  - 라우트별 응답 시간, 요청당 SQL 쿼리 수/시간을 기록하고
+  - SLOW_REQUEST_MS 이상 걸린 요청은 실행된 쿼리와 함께 로그로 남긴다.
+"""
+import time
+import logging
+import threading
+from bisect import bisect_left
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}' for key, value in items]
+
+
+class Gauge(_Metric):
+    """값을 직접 set 하거나, 출력 시점에 callback() -> {라벨 값 tuple: 값} 으로 계산"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        if self.callback is not None:
+            try:
+                items = list(self.callback().items())
+            except Exception:
+                logger.exception("gauge 계산 실패 (%s)", self.name)
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}' for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# ===========================
+# 지표 정의
+# ===========================
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간', ('route', 'method', 'status'))
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request', '요청당 SQL 쿼리 수', ('route',),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100))
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQL 쿼리 실행 시간', ())
+LLM_REQUEST_DURATION = Histogram(
+    'llm_request_duration_seconds', 'LLM 호출 시간 (재시도 포함)', ('provider', 'kind', 'outcome'))
+LLM_TOKENS = Counter(
+    'llm_tokens_total', 'LLM 사용 토큰 수', ('provider', 'kind', 'type'))
+LLM_PARSE_FAILURES = Counter(
+    'llm_parse_failures_total', 'LLM 응답 파싱 실패 수', ('kind',))
+SOCKETIO_EMITS = Counter(
+    'socketio_emits_total', 'Socket.IO 이벤트 전송 수', ('event',))
+SOCKETIO_EMIT_RECIPIENTS = Histogram(
+    'socketio_emit_recipients', '이벤트 1회 전송 시 방 인원 (이 워커에 연결된 인원 기준)', ('event',),
+    buckets=(0, 1, 5, 10, 20, 40, 80, 160, 320))
+
+
+# ===========================
+# 기록 헬퍼
+# ===========================
+def room_size(socketio, room, namespace='/'):
+    try:
+        return len(socketio.server.manager.rooms[namespace][room])
+    except (AttributeError, KeyError):
+        return 0
+
+
+def observe_emit(socketio, event_name, room):
+    SOCKETIO_EMITS.inc(event=event_name)
+    SOCKETIO_EMIT_RECIPIENTS.observe(room_size(socketio, room), event=event_name)
+
+
+def room_size_callback(socketio):
+    """방별 인원 gauge 계산 함수 (classroom_* 방만)"""
+    def callback():
+        try:
+            rooms = socketio.server.manager.rooms.get('/', {})
+        except AttributeError:
+            return {}
+        return {(room,): len(members) for room, members in list(rooms.items())
+                if isinstance(room, str) and room.startswith('classroom_')}
+    return callback
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    duration = time.perf_counter() - started
+    DB_QUERY_DURATION.observe(duration)
+    if has_request_context() and 'metrics_queries' in g:
+        g.metrics_queries.append((duration, statement))
+
+
+def init_app(app):
+    """
+    설정값
+      SLOW_REQUEST_MS : 이 시간(ms) 이상 걸린 요청을 쿼리 목록과 함께 로그 (0 이면 사용 안 함)
+    """
+    app.config.setdefault('SLOW_REQUEST_MS', 0)
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = []
+
+    @app.after_request
+    def record_request(response):
+        if 'metrics_started' not in g:
+            return response
+        duration = time.perf_counter() - g.metrics_started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        queries = g.metrics_queries
+
+        HTTP_REQUEST_DURATION.observe(duration, route=route, method=request.method,
+                                      status=response.status_code)
+        DB_QUERIES_PER_REQUEST.observe(len(queries), route=route)
+
+        slow_ms = app.config['SLOW_REQUEST_MS']
+        if slow_ms and duration * 1000 >= slow_ms:
+            slowest = sorted(queries, reverse=True)[:10]
+            logger.warning(
+                "느린 요청 %s %s %.1fms (쿼리 %d개, %.1fms)\n%s",
+                request.method, request.path, duration * 1000, len(queries),
+                sum(d for d, _ in queries) * 1000,
+                '\n'.join(f'  {d * 1000:.1f}ms  {" ".join(statement.split())[:300]}'
+                          for d, statement in slowest)
+            )
+        return response
@@ -0,0 +1,156 @@
+"""
+간단한 스키마 마이그레이션
+
+db.create_all()은 없는 테이블만 만들고 기존 테이블에 컬럼/인덱스를 추가하지 않으므로,
+운영 DB 변경 사항은 여기에 단계별로 추가한다. 각 단계는 여러 번 실행해도 안전해야 한다.
+"""
+import json
+
+from sqlalchemy import inspect, text
+
+
+def _columns(conn, table):
+    return {column['name'] for column in inspect(conn).get_columns(table)}
+
+
+def add_poll_version(conn):
+    """Poll.version: 실시간 업데이트 순서 확인 및 재동기화용 버전"""
+    if 'version' not in _columns(conn, 'poll'):
+        conn.execute(text("ALTER TABLE poll ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+
+def add_classroom_version(conn):
+    """Classroom.version: classroom_view 의 ETag/투표 목록 캐시용 버전"""
+    if 'version' not in _columns(conn, 'classroom'):
+        conn.execute(text("ALTER TABLE classroom ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+
+
+def add_vote_updated_at(conn):
+    """Vote.updated_at: 의견 요약을 새로 변경된 투표만으로 갱신하기 위한 변경 시각"""
+    if 'updated_at' not in _columns(conn, 'vote'):
+        conn.execute(text("ALTER TABLE vote ADD COLUMN updated_at TIMESTAMP"))
+        conn.execute(text("UPDATE vote SET updated_at = created_at WHERE updated_at IS NULL"))
+
+
+def add_vote_poll_version(conn):
+    """Vote.poll_version: 의견 요약에 반영된 투표를 커밋 순서대로 구분하기 위한 Poll 버전 (기존 투표는 0)"""
+    if 'poll_version' not in _columns(conn, 'vote'):
+        conn.execute(text("ALTER TABLE vote ADD COLUMN poll_version INTEGER"))
+        conn.execute(text("UPDATE vote SET poll_version = 0 WHERE poll_version IS NULL"))
+
+
+def add_summary_through_version(conn):
+    """PollSummary.through_version: 요약에 반영된 투표 중 가장 큰 Vote.poll_version (기존 요약은 비워 두고 다시 요약)"""
+    if 'through_version' not in _columns(conn, 'poll_summary'):
+        conn.execute(text("ALTER TABLE poll_summary ADD COLUMN through_version INTEGER"))
+
+
+def add_vote_previous_option(conn):
+    """Vote.previous_option_index: upsert 시 변경 전 선택지를 돌려받기 위한 컬럼"""
+    if 'previous_option_index' not in _columns(conn, 'vote'):
+        conn.execute(text("ALTER TABLE vote ADD COLUMN previous_option_index INTEGER"))
+
+
+def dedupe_votes(conn):
+    """고유 인덱스 생성 전, 같은 학생의 중복 투표 중 가장 최근 것만 남김"""
+    duplicated_polls = [row[0] for row in conn.execute(text(
+        "SELECT DISTINCT poll_id FROM vote GROUP BY poll_id, user_id HAVING COUNT(*) > 1"
+    ))]
+    if not duplicated_polls:
+        return
+    conn.execute(text(
+        "DELETE FROM vote WHERE id NOT IN "
+        "(SELECT MAX(id) FROM vote GROUP BY poll_id, user_id)"
+    ))
+    # 해당 Poll 의 집계는 fill_poll_tallies 단계에서 Vote 로부터 다시 채워지도록 삭제
+    for poll_id in duplicated_polls:
+        conn.execute(text("DELETE FROM poll_tally WHERE poll_id = :poll_id"), {'poll_id': poll_id})
+
+
+def fill_poll_tallies(conn):
+    """집계 행이 없는 Poll(집계 도입 이전 Poll, dedupe_votes 로 집계를 지운 Poll)의 집계를 Vote 로부터 채움"""
+    polls = conn.execute(text(
+        "SELECT id, options FROM poll WHERE NOT EXISTS "
+        "(SELECT 1 FROM poll_tally WHERE poll_tally.poll_id = poll.id)"
+    )).all()
+    for poll_id, options in polls:
+        counts = dict(conn.execute(text(
+            "SELECT option_index, COUNT(*) FROM vote WHERE poll_id = :poll_id GROUP BY option_index"
+        ), {'poll_id': poll_id}).all())
+        rows = [{'poll_id': poll_id, 'option_index': i, 'count': counts.get(i, 0)}
+                for i in range(len(json.loads(options)))]
+        if not rows:
+            continue
+        conn.execute(text(
+            "INSERT INTO poll_tally (poll_id, option_index, count) VALUES (:poll_id, :option_index, :count)"
+        ), rows)
+
+
+def _cascade_foreign_key(table, column, referred_table):
+    """
+    기존 외래 키를 ON DELETE CASCADE 로 다시 생성 (PostgreSQL)
+    SQLite 는 제약 변경에 테이블 재생성이 필요하므로 건너뜀 (새로 만든 DB 는 create_all 로 적용됨)
+    """
+    def step(conn):
+        if conn.dialect.name == 'sqlite':
+            return
+        for fk in inspect(conn).get_foreign_keys(table):
+            if fk['constrained_columns'] != [column] or fk['referred_table'] != referred_table:
+                continue
+            if (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE':
+                return
+            name = fk['name']
+            conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {name}"))
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+                f"REFERENCES {referred_table} (id) ON DELETE CASCADE"
+            ))
+    step.__name__ = f'cascade_{table}_{column}'
+    return step
+
+
+def _create_index(name, table, columns, unique=False):
+    def step(conn):
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+            f"ON {table} ({', '.join(columns)})"
+        ))
+    step.__name__ = f'create_{name}'
+    return step
+
+
+def _drop_index(name):
+    def step(conn):
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    step.__name__ = f'drop_{name}'
+    return step
+
+
+# 순서대로 실행됨
+STEPS = [
+    add_poll_version,
+    add_vote_previous_option,
+    dedupe_votes,
+    _create_index('uq_vote_poll_user', 'vote', ['poll_id', 'user_id'], unique=True),
+    _create_index('ix_vote_user', 'vote', ['user_id']),
+    _create_index('ix_poll_classroom_created', 'poll', ['classroom_id', 'created_at']),
+    _create_index('ix_classroom_professor_created', 'classroom', ['professor_id', 'created_at']),
+    _cascade_foreign_key('poll', 'classroom_id', 'classroom'),
+    _cascade_foreign_key('vote', 'poll_id', 'poll'),
+    _cascade_foreign_key('poll_tally', 'poll_id', 'poll'),
+    add_classroom_version,
+    # 키셋 페이지네이션을 위해 id 까지 포함한 인덱스로 교체
+    _create_index('ix_poll_classroom_created_id', 'poll', ['classroom_id', 'created_at', 'id']),
+    _drop_index('ix_poll_classroom_created'),
+    add_vote_updated_at,
+    fill_poll_tallies,
+    add_vote_poll_version,
+    add_summary_through_version,
+]
+
+
+def upgrade(db):
+    db.create_all()
+    with db.engine.begin() as conn:
+        for step in STEPS:
+            step(conn)
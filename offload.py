@@ -0,0 +1,77 @@
+"""
+블로킹 작업(외부 API 호출 등)을 eventlet 허브 밖에서 실행하기 위한 헬퍼
+
+eventlet 워커에서는 monkey patch 된 스레드가 모두 그린 스레드이므로,
+C 확장/네트워크 SDK 호출이 그대로 실행되면 허브 전체가 멈춘다.
+eventlet이 활성화된 경우 tpool(실제 OS 스레드 풀)로 넘기고,
+그렇지 않은 경우(threading 모드)에는 일반 ThreadPoolExecutor를 사용한다.
+"""
+import os
+import contextlib
+import concurrent.futures
+
+try:
+    import eventlet
+    from eventlet import tpool, greenpool
+except ImportError:  # eventlet이 설치되지 않은 환경 (threading 모드)
+    eventlet = None
+    tpool = None
+    greenpool = None
+
+
+class BlockingCallTimeout(Exception):
+    """블로킹 작업이 제한 시간 안에 끝나지 않았을 때 발생"""
+
+
+_executor = None
+
+
+def _use_tpool():
+    return eventlet is not None and eventlet.patcher.is_monkey_patched('thread')
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("OFFLOAD_MAX_WORKERS", 8))
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                          thread_name_prefix="offload")
+    return _executor
+
+
+def run_blocking(fn, *args, timeout=None, **kwargs):
+    """fn(*args, **kwargs)를 OS 스레드에서 실행하고 결과를 반환 (호출한 그린 스레드만 대기)"""
+    if _use_tpool():
+        # 제한 시간이 지나면 대기만 중단된다. OS 스레드의 작업 자체는 끝까지 실행됨.
+        with eventlet.Timeout(timeout, BlockingCallTimeout(f"{timeout}초 제한 시간 초과")):
+            return tpool.execute(fn, *args, **kwargs)
+
+    future = _get_executor().submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        raise BlockingCallTimeout(f"{timeout}초 제한 시간 초과")
+
+
+def map_blocking(fn, items, max_workers=4, limiter=None):
+    """
+    items 의 각 항목에 fn 을 OS 스레드에서 병렬로 적용하고 결과를 순서대로 반환
+    (hashlib 의 scrypt/pbkdf2 처럼 GIL 을 놓는 작업은 실제로 여러 코어를 사용)
+    limiter: 각 항목을 실행하는 동안 잡고 있을 세마포어 (다른 요청과 동시 실행 수를 함께 제한할 때)
+    """
+    items = list(items)
+    limiter = limiter or contextlib.nullcontext()
+    if _use_tpool():
+        def run_green(item):
+            # 세마포어는 그린 스레드에서 잡고 실제 작업만 OS 스레드로 넘김
+            with limiter:
+                return tpool.execute(fn, item)
+        pool = greenpool.GreenPool(max_workers)
+        return list(pool.imap(run_green, items))
+
+    def run(item):
+        with limiter:
+            return fn(item)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix="offload-map") as executor:
+        return list(executor.map(run, items))
@@ -1,12 +1,9 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
+import json
 
-load_dotenv()
+from llm import get_provider
 
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-
-model = genai.GenerativeModel('gemini-2.5-flash-lite')
+# 프롬프트/모델을 변경하면 올려서 이전 버전으로 생성된 캐시를 무효화
+PROMPT_VERSION = 1
 
 def generate_situation(topic):
   messages = f'''
@@ -30,9 +27,38 @@ def generate_situation(topic):
           주제 : {topic}\n
           '''
   
-  response = model.generate_content(messages)
-  
-  return response.text
+  return get_provider().generate(messages, kind='situation')
+
+def generate_situations(topics):
+  """
+  여러 주제의 상황/선택지를 한 번의 호출로 생성 (지시문을 주제마다 반복해서 보내지 않음)
+  응답은 [{"topic", "situation", "options"}, ...] 형태의 JSON
+  """
+  messages = f'''
+          당신은 공감 수업의 훌륭한 보조자입니다. 당신의 역할은 주어진 각 주제에 맞는 간단한 갈등상황을 제시하고, 이에 적합한 공감적 대안들을 선택지로 생성하는 것입니다.
+          선택지는 주제마다 총 4개로 구성되며, 2개는 공감적 판단이 많이 포함된, 나머지 2개는 개인 위주 판단이 약간 더 포함된 선택지를 생성하면 됩니다.
+
+          ** 주의 사항 **
+          주제 목록의 모든 주제에 대해, 주어진 순서대로 하나씩 생성할 것.
+          최종 출력은 JSON 배열만 출력할 것 (설명 문장 없이)
+          ex) [{{"topic": "주제", "situation": "상황", "options": ["선택지1", "선택지2", "선택지3", "선택지4"]}}]
+          대상은 중/고등학생으로 알아듣기 쉬운 단어를 사용할 것.
+          교수자가 요구한 주제에 맞춘 상황을 제시할 것.
+
+          ** 예시 **
+          주제 목록: ["친구와의 약속"]
+          [{{"topic": "친구와의 약속",
+            "situation": "너와 친구가 시험 끝난 후 같이 영화를 보기로 했는데, 다른 친구가 같은 시간에 게임하러 오자고 했어. 너는 어떻게 할까?",
+            "options": ["친구에게 \\"우리가 약속한 게 먼저니까 영화를 같이 보자\\"라고 말한다.",
+                        "게임하자고 한 친구에게 \\"오늘은 약속이 있어서 못 가, 다음에 같이 하자\\"라고 설명한다.",
+                        "영화 약속을 깜빡한 척하고 그냥 게임하러 간다.",
+                        "그냥 아무 말 안 하고 내가 더 하고 싶은 걸 선택한다."]}}]
+
+
+          주제 목록: {json.dumps(topics, ensure_ascii=False)}
+          '''
+
+  return get_provider().generate(messages, kind='situation_batch', json_output=True)
 
 if __name__=="__main__":
   result = generate_situation('지우개 훔치기')
@@ -1,12 +1,4 @@
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-
-model = genai.GenerativeModel('gemini-2.5-flash-lite')
+from llm import get_provider
 
 def generate_selection(situation, options):
   messages = '''
@@ -57,9 +49,7 @@ def generate_selection(situation, options):
           답안:
           '''
   
-  response = model.generate_content(messages+prompt)
-  
-  return response.text
+  return get_provider().generate(messages+prompt, kind='selection')
 
 if __name__=="__main__":
   result = generate_selection('친한 친구가 너의 소중한 지우개를 몰래 사용하다가 부러뜨린 것을 알게 되었어. 친구는 아무 말도 하지 않고 있어. 너는 어떻게 할까?',
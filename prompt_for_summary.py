@@ -0,0 +1,51 @@
+import os
+
+from llm import get_provider
+
+# 한 번의 호출에 넣을 학생 의견의 최대 글자 수 (넘으면 나눠서 이전 요약에 이어 붙임)
+SUMMARY_CHUNK_CHARS = int(os.getenv("SUMMARY_CHUNK_CHARS", 6000))
+
+def chunk_entries(entries, max_chars=SUMMARY_CHUNK_CHARS):
+  """의견 목록을 글자 수 기준으로 나눔 (의견 하나가 max_chars 보다 길어도 한 묶음으로 보냄)"""
+  chunk, size = [], 0
+  for entry in entries:
+    if chunk and size + len(entry) > max_chars:
+      yield chunk
+      chunk, size = [], 0
+    chunk.append(entry)
+    size += len(entry)
+  if chunk:
+    yield chunk
+
+def summarize_feedback(situation, options, entries, previous_summary=None):
+  """
+  학생들의 선택 이유와 AI 친구에게 한 말을 요약
+  entries: '선택: ... / 이유: ... / AI에게: ...' 형태의 문자열 목록 (새로 들어온 의견만)
+  previous_summary 가 있으면 그 요약에 새 의견을 반영해서 갱신 (이미 요약한 의견은 다시 보내지 않음)
+  """
+  summary = previous_summary
+  options_text = '\n'.join(f'{i}: {option}' for i, option in enumerate(options))
+  for chunk in chunk_entries(entries):
+    feedback = '\n'.join(f'- {entry}' for entry in chunk)
+    messages = f'''
+          당신은 공감 수업의 훌륭한 보조자입니다. 당신의 역할은 투표에 참여한 학생들이 쓴 선택 이유와 AI 친구에게 한 말을 교수자가 한눈에 볼 수 있도록 요약하는 것입니다.
+
+          ** 주의 사항 **
+          선택지별로 학생들이 든 주요 이유, AI 친구의 선택에 대한 학생들의 반응, 눈에 띄는 소수 의견을 정리할 것.
+          5줄 이내의 짧은 문장으로, 각 줄은 '- '로 시작할 것.
+          학생 이름 등 개인을 특정하는 내용은 쓰지 말 것.
+          기존 요약이 있으면 새 의견을 반영해서 기존 요약을 갱신할 것 (기존 요약의 내용도 유지).
+
+          상황:
+          {situation}
+          선택지:
+          {options_text}
+
+          기존 요약:
+          {summary or '(없음)'}
+
+          새 의견:
+          {feedback}
+          '''
+    summary = get_provider().generate(messages, kind='summary').strip()
+  return summary
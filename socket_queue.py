@@ -0,0 +1,153 @@
+"""
+외부 브로커 없이 같은 머신의 여러 워커 프로세스가 Socket.IO 메시지를 공유하기 위한 매니저
+
+python-socketio 의 PubSubManager(RedisManager/KombuManager 와 같은 구조)를 상속하고,
+전송 계층으로 UNIX 데이터그램 소켓을 사용한다.
+각 워커는 공유 디렉터리에 자신의 소켓 파일을 만들고, 발행(publish) 시에는
+디렉터리의 모든 소켓(자기 자신 포함)으로 메시지를 보낸다. Redis pub/sub 과 같은 동작.
+
+메시지는 RedisManager 와 같이 JSON 으로 보낸다. 데이터그램 하나보다 큰 메시지는
+(메시지 id, 순번, 전체 개수) 헤더를 붙인 조각으로 나눠 보내고, 받는 쪽에서 다시 합친다.
+
+URL 형식
+  local://              -> 임시 디렉터리 아래 사용자/앱 인스턴스별 기본 경로 사용
+  local:///var/run/app  -> 지정한 디렉터리 사용
+
+소켓 디렉터리는 현재 사용자만 접근할 수 있어야 한다 (0700, 소유자 확인).
+다른 사용자가 미리 만들어 둔 디렉터리면 메시지를 엿보거나 끼워 넣을 수 있으므로 시작하지 않는다.
+"""
+import os
+import stat
+import uuid
+import hashlib
+import struct
+import atexit
+import json
+import socket
+import logging
+import tempfile
+import threading
+from urllib.parse import urlparse
+from collections import OrderedDict
+
+from socketio import PubSubManager
+
+logger = logging.getLogger(__name__)
+
+# UNIX 데이터그램 한 개의 최대 크기 (소켓 버퍼 기본값보다 작게 유지)
+MAX_MESSAGE_SIZE = 64 * 1024
+
+# 조각 헤더: 메시지 id(16 bytes), 순번, 전체 조각 수
+CHUNK_HEADER = struct.Struct('!16sII')
+CHUNK_SIZE = MAX_MESSAGE_SIZE - CHUNK_HEADER.size
+
+# 다 모이지 않은 메시지를 보관하는 최대 개수 (보내던 워커가 죽은 경우 등)
+MAX_PARTIAL_MESSAGES = 100
+
+
+def default_directory(instance=''):
+    """사용자와 앱 인스턴스(instance 문자열)마다 다른 임시 디렉터리 경로"""
+    digest = hashlib.sha1(instance.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'empathy-socketio-{os.getuid()}-{digest}')
+
+
+def secure_directory(path):
+    """현재 사용자 전용(0700) 디렉터리를 만들고, 이미 있으면 소유자와 권한을 확인"""
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f'Socket.IO 소켓 디렉터리 {path} 는 현재 사용자 소유의 0700 디렉터리여야 합니다')
+
+
+class LocalSocketManager(PubSubManager):
+    name = 'local'
+
+    def __init__(self, url='local://', channel='socketio', write_only=False, logger=None, instance=''):
+        """instance: 기본 경로를 앱 인스턴스별로 나누기 위한 값 (같은 머신의 다른 앱과 메시지를 공유하지 않도록)"""
+        self.base_directory = urlparse(url).path or default_directory(instance)
+        self.directory = os.path.join(self.base_directory, channel)
+        self._pid = None
+        self._listen_path = None
+        self._listen_sock = None
+        self._send_sock = None
+        self._socket_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _ensure_sockets(self):
+        # gunicorn 이 fork 한 뒤 워커마다 자신의 소켓을 새로 만들도록 pid 확인
+        if self._pid == os.getpid():
+            return
+        with self._socket_lock:
+            if self._pid != os.getpid():
+                self._open_sockets()
+
+    def _open_sockets(self):
+        parent = os.path.dirname(self.base_directory.rstrip(os.sep))
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        secure_directory(self.base_directory)
+        secure_directory(self.directory)
+        self._listen_path = os.path.join(self.directory,
+                                         f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+        self._listen_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._listen_sock.bind(self._listen_path)
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # 응답하지 않는 워커 때문에 발행이 오래 멈추지 않도록 제한
+        self._send_sock.settimeout(1.0)
+        self._pid = os.getpid()
+        atexit.register(self._cleanup)
+
+    def _cleanup(self):
+        if self._pid == os.getpid():
+            try:
+                os.unlink(self._listen_path)
+            except OSError:
+                pass
+
+    def _publish(self, data):
+        self._ensure_sockets()
+        message = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        message_id = uuid.uuid4().bytes
+        total = max(1, -(-len(message) // CHUNK_SIZE))
+        chunks = [CHUNK_HEADER.pack(message_id, index, total)
+                  + message[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+                  for index in range(total)]
+
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                for chunk in chunks:
+                    self._send_sock.sendto(chunk, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 종료된 워커가 남긴 소켓 파일 정리
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                self._get_logger().warning('Socket.IO 메시지 전송 실패 (%s): %s', name, e)
+
+    def _listen(self):
+        self._ensure_sockets()
+        partials = OrderedDict()  # 메시지 id -> {순번: 조각}
+        while True:
+            datagram = self._listen_sock.recv(MAX_MESSAGE_SIZE)
+            if len(datagram) < CHUNK_HEADER.size:
+                continue
+            message_id, index, total = CHUNK_HEADER.unpack_from(datagram)
+            payload = datagram[CHUNK_HEADER.size:]
+            if total == 1:
+                yield json.loads(payload)
+                continue
+
+            parts = partials.setdefault(message_id, {})
+            parts[index] = payload
+            if len(parts) < total:
+                while len(partials) > MAX_PARTIAL_MESSAGES:
+                    partials.popitem(last=False)
+                continue
+            del partials[message_id]
+            yield json.loads(b''.join(parts[i] for i in range(total)))
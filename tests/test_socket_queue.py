@@ -0,0 +1,83 @@
+"""LocalSocketManager 로 두 워커 사이에 Socket.IO 메시지가 전달되는지 확인
+
+python -m unittest discover tests
+"""
+import os
+import sys
+import queue
+import shutil
+import tempfile
+import unittest
+
+import socketio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socket_queue import LocalSocketManager, MAX_MESSAGE_SIZE, default_directory
+
+
+class LocalSocketManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sender = self._make_manager()
+        self.receiver = self._make_manager()
+        self.received = queue.Queue()
+        self.receiver._handle_emit = self.received.put
+        # 발행한 워커도 자기 소켓으로 메시지를 받으므로 양쪽 모두 수신 스레드를 실행
+        self.sender.initialize()
+        self.receiver.initialize()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _make_manager(self):
+        manager = LocalSocketManager(f'local://{self.directory}')
+        socketio.Server(client_manager=manager, async_mode='threading')
+        # 리스너 소켓을 먼저 만들어 두어야 상대의 발행을 받을 수 있음
+        manager._ensure_sockets()
+        return manager
+
+    def _receive(self):
+        return self.received.get(timeout=5)
+
+    def test_emit_crosses_to_other_manager(self):
+        self.sender.emit('new_poll', {'poll_id': 1, 'question': '누구를 도울까요?'},
+                         namespace='/', room='classroom_1')
+
+        message = self._receive()
+        self.assertEqual(message['event'], 'new_poll')
+        self.assertEqual(message['room'], 'classroom_1')
+        self.assertEqual(message['data'], {'poll_id': 1, 'question': '누구를 도울까요?'})
+
+    def test_large_emit_is_split_and_reassembled(self):
+        votes = [{'user': f'학생{i}', 'reason': '친구의 마음을 생각해서 선택했어요. ' * 50}
+                 for i in range(40)]
+        self.sender.emit('vote_update_batch', {'votes': votes}, namespace='/', room='poll_1')
+
+        message = self._receive()
+        self.assertGreater(len(str(message['data']).encode('utf-8')), MAX_MESSAGE_SIZE)
+        self.assertEqual(message['event'], 'vote_update_batch')
+        self.assertEqual(message['data'], {'votes': votes})
+
+
+    def test_rejects_directory_accessible_by_others(self):
+        directory = os.path.join(self.directory, 'shared')
+        os.mkdir(directory)
+        os.chmod(directory, 0o777)
+        manager = LocalSocketManager(f'local://{directory}')
+        with self.assertRaises(RuntimeError):
+            manager._ensure_sockets()
+
+    def test_creates_private_directories(self):
+        directory = os.path.join(self.directory, 'private')
+        LocalSocketManager(f'local://{directory}')._ensure_sockets()
+        self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(os.path.join(directory, 'socketio')).st_mode & 0o777, 0o700)
+
+    def test_default_directory_is_per_instance(self):
+        self.assertNotEqual(default_directory('/srv/a|sqlite:///a.db'),
+                            default_directory('/srv/b|sqlite:///b.db'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+로그인 사용자 캐시
+
+Flask-Login 의 user_loader 는 모든 HTTP 요청과 current_user 를 사용하는 Socket.IO 이벤트마다 호출된다.
+id/username/role 만 담은 가벼운 객체를 TTL 동안 메모리에 보관해서 DB 조회 없이 인증한다.
+User 가 변경/삭제되면 invalidate 로 즉시 제거한다 (다른 워커 프로세스는 TTL 이 지나면 갱신).
+"""
+import time
+import threading
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+
+class CachedUser(UserMixin):
+    """current_user 로 사용되는 읽기 전용 사용자 정보"""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __repr__(self):
+        return f"<CachedUser {self.id} {self.username}>"
+
+
+class UserCache:
+    def __init__(self, ttl=300, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (만료 시각, CachedUser)
+        self._lock = threading.Lock()
+
+    def get(self, user_id, loader):
+        """캐시에 있으면 반환하고, 없거나 만료되었으면 loader(user_id)로 불러와 저장"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        user = loader(user_id)
+        if user is None:
+            self.invalidate(user_id)
+            return None
+
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,177 @@
+"""
+투표 쓰기 지연(write-behind) 버퍼
+
+VOTE_INGEST_MODE=buffered 일 때 submit_vote 는 투표를 메모리 큐에 넣고 바로 응답한다.
+백그라운드 작업이 짧은 간격(VOTE_FLUSH_INTERVAL_MS)마다, 또는 VOTE_FLUSH_MAX_BATCH 개가 모이면
+모인 투표를 트랜잭션 하나로 저장(그룹 커밋)한다.
+
+- 같은 학생이 저장 전에 다시 투표하면 마지막 투표만 저장
+- 저장 전인 투표는 pending_vote 로 조회할 수 있어 같은 프로세스의 poll_view 에서 바로 보임
+- 프로세스 종료 시(atexit) 남은 투표를 저장
+  정상 종료(SIGTERM 후 gunicorn graceful 종료 등)에서만 동작한다. SIGKILL, OOM, graceful_timeout 을
+  넘겨 강제 종료된 경우에는 저장 전 투표(최대 VOTE_FLUSH_INTERVAL_MS 동안 모인 투표)가 사라진다.
+- 묶음 저장이 실패하면 한 개씩 따로 저장해서 문제가 있는 투표만 골라냄
+  (예: 저장 도중 Poll 이 삭제된 투표 때문에 나머지 투표까지 잃지 않도록)
+- 한 개씩 저장해도 실패한 투표는 다시 큐에 넣고 재시도 (MAX_ATTEMPTS 회 실패한 투표는 로그를 남기고 버림)
+"""
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+class VoteBuffer:
+    """
+    설정값
+      VOTE_FLUSH_INTERVAL_MS : 첫 투표가 들어온 뒤 저장까지 기다리는 시간(ms)
+      VOTE_FLUSH_MAX_BATCH   : 이 개수가 모이면 기다리지 않고 저장
+    flush_fn(votes) 는 앱 컨텍스트 안에서 호출되며 votes 를 한 트랜잭션으로 저장해야 한다.
+    """
+
+    def __init__(self, app=None, socketio=None, flush_fn=None):
+        self.app = None
+        self.socketio = None
+        self.flush_fn = None
+        self.interval = 0.0
+        self.max_batch = 0
+        self._pending = OrderedDict()   # (poll_id, user_id) -> vote
+        self._flushing = {}             # 저장 중인 투표 (저장이 끝날 때까지 pending_vote 로 조회 가능)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._full = threading.Event()
+        self._worker_started = False
+        # 저장 통계
+        self.batches = 0
+        self.flushed = 0
+        self.largest_batch = 0
+        self.failures = 0
+        if app is not None:
+            self.init_app(app, socketio, flush_fn)
+
+    def init_app(self, app, socketio, flush_fn):
+        app.config.setdefault('VOTE_FLUSH_INTERVAL_MS', 20)
+        app.config.setdefault('VOTE_FLUSH_MAX_BATCH', 200)
+        self.app = app
+        self.socketio = socketio
+        self.flush_fn = flush_fn
+        self.interval = app.config['VOTE_FLUSH_INTERVAL_MS'] / 1000
+        self.max_batch = app.config['VOTE_FLUSH_MAX_BATCH']
+        app.extensions['vote_buffer'] = self
+        atexit.register(self.flush)
+
+    def submit(self, vote):
+        """vote: poll_id, user_id 를 포함한 dict"""
+        self._ensure_worker()
+        key = (vote['poll_id'], vote['user_id'])
+        with self._lock:
+            self._pending.pop(key, None)
+            self._pending[key] = dict(vote, attempts=0)
+            full = len(self._pending) >= self.max_batch
+        self._wake.set()
+        if full:
+            self._full.set()
+
+    def pending_vote(self, poll_id, user_id):
+        """아직 DB 에 저장되지 않은 투표 (없으면 None)"""
+        key = (poll_id, user_id)
+        with self._lock:
+            return self._pending.get(key) or self._flushing.get(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending) + len(self._flushing),
+                'batches': self.batches,
+                'flushed': self.flushed,
+                'largest_batch': self.largest_batch,
+                'failures': self.failures,
+            }
+
+    def flush(self):
+        """모인 투표를 저장 (백그라운드 작업과 atexit 에서 호출)"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, OrderedDict()
+                votes = list(self._flushing.values())
+
+            try:
+                failed = self._save(votes)
+                if failed:
+                    self._requeue(failed)
+                saved = len(votes) - len(failed)
+                if saved:
+                    with self._lock:
+                        self.batches += 1
+                        self.flushed += saved
+                        self.largest_batch = max(self.largest_batch, saved)
+            finally:
+                with self._lock:
+                    self._flushing = {}
+
+    def _save(self, votes):
+        """votes 를 한 트랜잭션으로 저장하고, 실패하면 한 개씩 따로 저장. 반환: 저장하지 못한 투표 목록"""
+        try:
+            with self.app.app_context():
+                self.flush_fn(votes)
+            return []
+        except Exception:
+            if len(votes) == 1:
+                logger.exception("투표 저장 실패: poll=%s user=%s", votes[0]['poll_id'], votes[0]['user_id'])
+                return votes
+            logger.exception("투표 %d개 묶음 저장 실패, 한 개씩 다시 저장", len(votes))
+
+        failed = []
+        for vote in votes:
+            try:
+                with self.app.app_context():
+                    self.flush_fn([vote])
+            except Exception:
+                logger.exception("투표 저장 실패: poll=%s user=%s", vote['poll_id'], vote['user_id'])
+                failed.append(vote)
+        return failed
+
+    def _requeue(self, votes):
+        with self._lock:
+            self.failures += 1
+            for vote in votes:
+                key = (vote['poll_id'], vote['user_id'])
+                vote['attempts'] += 1
+                if vote['attempts'] >= MAX_ATTEMPTS:
+                    logger.error("투표 저장을 포기함: poll=%s user=%s", *key)
+                    continue
+                # 그 사이 같은 학생이 다시 투표했다면 새 투표를 유지
+                if key not in self._pending:
+                    self._pending[key] = vote
+                    self._pending.move_to_end(key, last=False)
+
+    def _ensure_worker(self):
+        if self._worker_started:
+            return
+        with self._lock:
+            if self._worker_started:
+                return
+            self._worker_started = True
+        self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            # 첫 투표가 들어오면 interval 동안(또는 가득 찰 때까지) 더 모은 뒤 저장
+            self._wake.wait()
+            self._full.wait(self.interval)
+            self._wake.clear()
+            self._full.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("투표 저장 작업 오류")
+            # 실패해서 다시 넣은 투표가 있으면 다음 주기에 재시도
+            with self._lock:
+                if self._pending:
+                    self._wake.set()